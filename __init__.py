@@ -13,7 +13,11 @@ from anki.hooks import addHook
 from .gui import FloatCardPopup
 from .config import Config
 from .scheduler import FloatCardScheduler
+from .schedule_engine import ScheduleEngine
 from .main import setup_menu
+from .watchdog import StallDetector
+from .metrics import MetricsExporter
+from .invalidation import bus
 import logging
 import sys
 
@@ -30,7 +34,16 @@ float_card_popup = FloatCardPopup(mw)
 float_card_popup.hide()  # Ensure it's hidden
 
 # Initialize the scheduler with the popup window's show_popup method
-scheduler = FloatCardScheduler(float_card_popup.show_popup)
+scheduler = FloatCardScheduler(float_card_popup.show_popup, status_func=float_card_popup.set_schedule_status)
+
+# Serves scheduling.schedules when several schedules are configured
+schedule_engine = ScheduleEngine(float_card_popup)
+
+# Main-thread stall detector, started on profile load if enabled
+stall_detector = StallDetector()
+
+# Prometheus textfile export, started on profile load if enabled
+metrics_exporter = MetricsExporter(float_card_popup)
 
 # Initialize the addon
 def init_addon():
@@ -38,10 +51,17 @@ def init_addon():
     try:
         # Set up menu and hooks
         setup_menu()
+        bus.start()
         
         # Update scheduler state
         config = Config.get_config()
         scheduler.update_state(config)
+        schedule_engine.update_state(config)
+        stall_detector.update_state(config)
+        float_card_popup.memory_tracker.update_state(config)
+        metrics_exporter.update_state(config)
+        float_card_popup.telemetry.update_state(config)
+        float_card_popup.card_queue.update_state(config)
         
         logger.info("Mini Card Popup addon initialized")
     except Exception as e:
@@ -57,6 +77,7 @@ def show_options():
     # Update scheduler state after config changes
     config = Config.get_config()
     scheduler.update_state(config)
+    schedule_engine.update_state(config)
     
     # Show feedback about scheduling state
     if config.get('scheduling', {}).get('enabled', False):
@@ -76,6 +97,12 @@ def on_config_changed(config):
     """Handle configuration changes."""
     try:
         scheduler.update_state(config)
+        schedule_engine.update_state(config)
+        stall_detector.update_state(config)
+        float_card_popup.memory_tracker.update_state(config)
+        metrics_exporter.update_state(config)
+        float_card_popup.telemetry.update_state(config)
+        float_card_popup.card_queue.update_state(config)
         logger.info("Configuration updated, scheduler state refreshed")
     except Exception as e:
         logger.error(f"Error updating configuration: {e}")
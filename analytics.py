@@ -0,0 +1,192 @@
+"""Statistics over the popup's review history.
+
+Reads only the hourly running sums that the telemetry writer maintains, so
+opening the view costs O(hours with reviews), however many events there are.
+
+Buckets are whole UTC hours. In time zones offset by a fraction of an hour
+(e.g. UTC+5:30), each bucket straddles two local hours and is counted under
+the one it starts in.
+"""
+
+import pathlib
+import sqlite3
+import time
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
+from aqt.utils import tooltip
+
+from .logger import setup_logger
+from .telemetry import ORIGIN_SCHEDULED, ORIGIN_MANUAL, ORIGIN_MAIN
+
+# Get logger
+logger = setup_logger()
+
+ORIGIN_LABELS = {
+    ORIGIN_SCHEDULED: "Popup (scheduled)",
+    ORIGIN_MANUAL: "Popup (opened by hand)",
+    ORIGIN_MAIN: "Main reviewer",
+}
+
+PERIODS = [
+    ("Last 7 days", 7),
+    ("Last 30 days", 30),
+    ("Last year", 365),
+    ("All time", 0),
+]
+
+# Hours with fewer scheduled popups than this are not ranked
+MIN_POPUPS_FOR_BEST_HOUR = 5
+
+def load_buckets(path, days=0):
+    """Load the hourly buckets, optionally limited to the last `days` days."""
+    since_hour = int((time.time() - days * 86400) // 3600) if days else 0
+    conn = sqlite3.connect(pathlib.Path(path).as_uri() + "?mode=ro", uri=True)
+    try:
+        return conn.execute(
+            "SELECT hour, origin, reviews, correct, answer_ms_sum, answer_ms_count, popups, response_s_sum "
+            "FROM review_hourly WHERE hour >= ?", (since_hour,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else None
+
+def summarize(buckets):
+    """Combine hourly buckets into per-origin and per-hour-of-day statistics.
+
+    Returns:
+        A dict with "origins" (keyed by origin) and "hours" (24 entries, local
+        time) holding reviews, retention, mean answer time, cards per popup and
+        mean response time to popups, plus "best_hour" or None
+    """
+    def empty():
+        return {"reviews": 0, "correct": 0, "answer_ms_sum": 0, "answer_ms_count": 0,
+                "popups": 0, "response_s_sum": 0.0}
+
+    origins = {origin: empty() for origin in ORIGIN_LABELS}
+    hours = [empty() for _ in range(24)]
+    for hour, origin, reviews, correct, answer_ms_sum, answer_ms_count, popups, response_s_sum in buckets:
+        targets = [origins.setdefault(origin, empty())]
+        if origin != ORIGIN_MAIN:
+            # The local hour the UTC bucket starts in
+            targets.append(hours[time.localtime(hour * 3600).tm_hour])
+        for totals in targets:
+            totals["reviews"] += reviews
+            totals["correct"] += correct
+            totals["answer_ms_sum"] += answer_ms_sum
+            totals["answer_ms_count"] += answer_ms_count
+            totals["popups"] += popups
+            totals["response_s_sum"] += response_s_sum
+
+    def finish(totals):
+        return {
+            "reviews": totals["reviews"],
+            "popups": totals["popups"],
+            "retention": _ratio(totals["correct"], totals["reviews"]),
+            "mean_answer_s": _ratio(totals["answer_ms_sum"] / 1000, totals["answer_ms_count"]),
+            "cards_per_popup": _ratio(totals["reviews"], totals["popups"]),
+            "mean_response_s": _ratio(totals["response_s_sum"], totals["popups"]),
+        }
+
+    result = {
+        "origins": {origin: finish(totals) for origin, totals in origins.items()},
+        "hours": [finish(totals) for totals in hours],
+    }
+    # Best hour: fastest response to popups, then highest retention
+    ranked = [
+        (stats["mean_response_s"], -(stats["retention"] or 0), hour)
+        for hour, stats in enumerate(result["hours"]) if stats["popups"] >= MIN_POPUPS_FOR_BEST_HOUR
+    ]
+    result["best_hour"] = min(ranked)[2] if ranked else None
+    return result
+
+def _format(value, pattern):
+    return "-" if value is None else pattern.format(value)
+
+STAT_COLUMNS = [
+    ("Reviews", "reviews", "{}"),
+    ("Retention", "retention", "{:.1%}"),
+    ("Answer time (s)", "mean_answer_s", "{:.1f}"),
+    ("Cards / popup", "cards_per_popup", "{:.1f}"),
+    ("Response (s)", "mean_response_s", "{:.0f}"),
+]
+
+class AnalyticsDialog(QDialog):
+    """Show how popup reviews compare to regular reviews."""
+
+    def __init__(self, popup):
+        super().__init__(popup)
+        self.popup = popup
+        self.setWindowTitle("Float Cards Review Statistics")
+        self.setMinimumSize(620, 560)
+
+        layout = QVBoxLayout()
+        period_layout = QHBoxLayout()
+        period_layout.addWidget(QLabel("Period:"))
+        self.period_combo = QComboBox()
+        self.period_combo.addItems([label for label, _ in PERIODS])
+        self.period_combo.setCurrentIndex(1)
+        self.period_combo.currentIndexChanged.connect(self.refresh)
+        period_layout.addWidget(self.period_combo)
+        period_layout.addStretch()
+        layout.addLayout(period_layout)
+
+        self.origin_table = self._make_table(len(ORIGIN_LABELS), "Source")
+        layout.addWidget(self.origin_table)
+
+        self.best_hour_label = QLabel()
+        layout.addWidget(self.best_hour_label)
+
+        layout.addWidget(QLabel("Popup reviews by hour of day:"))
+        self.hour_table = self._make_table(24, "Hour")
+        layout.addWidget(self.hour_table)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def _make_table(self, rows, first_column):
+        table = QTableWidget(rows, len(STAT_COLUMNS) + 1)
+        table.setHorizontalHeaderLabels([first_column] + [label for label, _, _ in STAT_COLUMNS])
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        table.verticalHeader().setVisible(False)
+        return table
+
+    def _fill_row(self, table, row, label, stats):
+        table.setItem(row, 0, QTableWidgetItem(label))
+        for column, (_, key, pattern) in enumerate(STAT_COLUMNS, start=1):
+            table.setItem(row, column, QTableWidgetItem(_format(stats[key], pattern)))
+
+    def refresh(self):
+        """Reload the statistics for the selected period.
+
+        Only what the writer thread has committed is read; buffered answers
+        are handed to it and show up on the next refresh.
+        """
+        try:
+            self.popup.telemetry.flush()
+            days = PERIODS[self.period_combo.currentIndex()][1]
+            summary = summarize(load_buckets(self.popup.telemetry.path, days))
+
+            for row, (origin, label) in enumerate(ORIGIN_LABELS.items()):
+                self._fill_row(self.origin_table, row, label, summary["origins"][origin])
+            for hour, stats in enumerate(summary["hours"]):
+                self._fill_row(self.hour_table, hour, f"{hour:02d}:00", stats)
+
+            best_hour = summary["best_hour"]
+            if best_hour is None:
+                self.best_hour_label.setText("Best time of day: not enough popups yet")
+            else:
+                self.best_hour_label.setText(
+                    f"Best time of day: {best_hour:02d}:00-{(best_hour + 1) % 24:02d}:00 (fastest response to popups)"
+                )
+        except sqlite3.OperationalError:
+            self.best_hour_label.setText("No review history yet")
+        except Exception as e:
+            logger.error(f"Error loading review statistics: {str(e)}", exc_info=True)
+            tooltip("Error loading review statistics")
@@ -0,0 +1,99 @@
+"""Self-tuning scheduling frequency for the Float Cards addon.
+
+`next_interval` is a pure function of the recent popup outcomes, the number
+of due cards and the time left until the target, so it can be checked
+against recorded data without Anki. The scheduler calls it after every
+scheduled popup when `scheduling.auto_tune.enabled` is set.
+"""
+
+import collections
+import math
+import statistics
+import time
+
+class PopupOutcome:
+    """How a scheduled popup went: response time to the first answer, or None if dismissed."""
+
+    __slots__ = ("shown_at", "response_s", "cards")
+
+    def __init__(self, shown_at, response_s, cards):
+        self.shown_at = shown_at
+        self.response_s = response_s
+        self.cards = cards
+
+    @property
+    def dismissed(self):
+        return self.response_s is None
+
+class PopupOutcomes:
+    """The most recent scheduled popup outcomes."""
+
+    def __init__(self, size=20):
+        self.recent = collections.deque(maxlen=size)
+
+    def record(self, shown_at, response_s, cards):
+        self.recent.append(PopupOutcome(shown_at, response_s, cards))
+
+    def clear(self):
+        self.recent.clear()
+
+# Filled by the popup as scheduled popups are answered or dismissed
+outcomes = PopupOutcomes()
+
+def seconds_until(target_time, now=None):
+    """Seconds from `now` until "HH:MM" local time today.
+
+    Returns:
+        The seconds left, or None if that time has already passed today (the
+        target is a daily deadline, not rolled over to tomorrow) or the time
+        is not parseable
+    """
+    try:
+        hours, minutes = (int(part) for part in target_time.split(":"))
+    except (AttributeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    local = time.localtime(now)
+    target = time.mktime((local.tm_year, local.tm_mon, local.tm_mday, hours, minutes, 0, 0, 0, -1))
+    return target - now if target > now else None
+
+def next_interval(current, recent, due_cards, seconds_left, min_minutes, max_minutes):
+    """Pick the next scheduling interval in minutes.
+
+    Args:
+        current: The current interval in minutes
+        recent: Recent PopupOutcome records, oldest first
+        due_cards: Cards still due in the scheduled deck, or None if unknown
+        seconds_left: Seconds until the target time, or None if there is none
+        min_minutes: Shortest allowed interval
+        max_minutes: Longest allowed interval
+
+    Returns:
+        The interval in whole minutes, within the bounds
+    """
+    answered = [o for o in recent if not o.dismissed]
+
+    if due_cards == 0:
+        # Nothing left to do: interrupt as rarely as allowed
+        target = max_minutes
+    elif due_cards is None or not seconds_left:
+        target = current
+    else:
+        # Spread the popups needed to clear the queue over the time left
+        cards_per_popup = statistics.fmean(o.cards for o in answered) if answered else 1
+        popups_needed = math.ceil(due_cards / max(cards_per_popup, 1))
+        target = seconds_left / 60 / popups_needed
+
+    if recent:
+        # Back off while popups are being ignored
+        dismiss_rate = (len(recent) - len(answered)) / len(recent)
+        target *= 1 + dismiss_rate
+    if answered:
+        # Don't stack popups faster than they get answered
+        response_minutes = statistics.median(o.response_s for o in answered) / 60
+        target = max(target, 2 * response_minutes)
+
+    # Change gradually, at most halving or doubling per step
+    target = min(max(target, current / 2), current * 2)
+    target = min(max(target, min_minutes), max_minutes)
+    return max(1, int(round(target)))
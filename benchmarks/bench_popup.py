@@ -0,0 +1,243 @@
+"""Headless benchmarks for the popup render and config paths.
+
+Runs against a scratch copy of the add-on and the stand-ins in ``standin.py``,
+so no Anki installation is required::
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_popup.py -o before.json
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_popup.py -o after.json --compare before.json
+
+Results are written as JSON (one entry per benchmark, timings in ms) so runs
+can be compared against each other.
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standin  # noqa: E402
+
+
+def summarize(samples):
+    """Summarise a list of durations in seconds as milliseconds."""
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "count": len(ms),
+        "min_ms": ms[0],
+        "median_ms": statistics.median(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "max_ms": ms[-1],
+        "stdev_ms": statistics.stdev(ms) if len(ms) > 1 else 0.0,
+    }
+
+
+def measure(func, iterations, warmup=3):
+    """Call ``func`` ``iterations`` times and return per-call durations."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def wait_for_load(popup, app, timeout=5.0):
+    """Process events until the popup's page finishes loading."""
+    loaded = []
+    popup.web_view.loadFinished.connect(loaded.append)
+    deadline = time.perf_counter() + timeout
+    while not loaded and time.perf_counter() < deadline:
+        app.processEvents()
+    popup.web_view.loadFinished.disconnect(loaded.append)
+    return bool(loaded)
+
+
+class PopupBenchmarks:
+    def __init__(self, app, mw, package, iterations):
+        self.app = app
+        self.mw = mw
+        self.iterations = iterations
+        self.gui = importlib.import_module(f"{package}.gui")
+        self.config = importlib.import_module(f"{package}.config").Config
+        self.popup = self.gui.FloatCardPopup(mw)
+        self.popup.show()
+        self.app.processEvents()
+
+    def bench_update_card(self):
+        return measure(self.popup.update_card, self.iterations)
+
+    def bench_update_card_loaded(self):
+        def run():
+            self.popup.update_card()
+            wait_for_load(self.popup, self.app)
+        return measure(run, self.iterations)
+
+    def bench_show_answer(self):
+        return measure(self.popup.show_answer, self.iterations)
+
+    def bench_show_answer_loaded(self):
+        def run():
+            self.popup.show_answer()
+            wait_for_load(self.popup, self.app)
+        return measure(run, self.iterations)
+
+    def bench_grade_headless(self):
+        """Answer and render the next card with the popup reviewing by itself."""
+        config = self.config.get_config()
+        self.config.save_config({**config, "review_mode": "headless"})
+        self.popup.start_headless(self.mw.col.decks.get_current_id())
+
+        def run():
+            self.popup.answer_shown = True
+            self.popup.grade_card(3)
+        try:
+            self.popup.update_card()
+            return measure(run, self.iterations)
+        finally:
+            self.config.save_config(config)
+            self.popup.config = config
+
+    def bench_generate_card_html(self):
+        card = self.mw.reviewer.card
+        theme = self.popup.config["theme"]["dark"]
+        return measure(
+            lambda: self.popup._generate_card_html(card.a(), True, "win", theme),
+            self.iterations * 10,
+        )
+
+    def bench_config_get(self):
+        return measure(self.config.get_config, self.iterations)
+
+    def bench_config_round_trip(self):
+        def run():
+            self.config.save_config(self.config.get_config())
+        return measure(run, self.iterations)
+
+    def bench_resize_storm(self):
+        from PyQt6.QtCore import QSize
+        from PyQt6.QtGui import QResizeEvent
+
+        def run():
+            width, height = self.popup.width(), self.popup.height()
+            for step in range(20):
+                new = QSize(width + step, height + step)
+                old = QSize(width + step - 1, height + step - 1)
+                self.popup.resizeEvent(QResizeEvent(new, old))
+        return measure(run, self.iterations)
+
+    def _key_event(self, key, text, modifiers=None):
+        from PyQt6.QtCore import QEvent, Qt
+        from PyQt6.QtGui import QKeyEvent
+
+        if modifiers is None:
+            modifiers = Qt.KeyboardModifier.NoModifier
+        return QKeyEvent(QEvent.Type.KeyPress, key, modifiers, text)
+
+    def bench_key_press_unbound(self):
+        from PyQt6.QtCore import Qt
+
+        event = self._key_event(Qt.Key.Key_X, "x")
+        return measure(lambda: self.popup.keyPressEvent(event), self.iterations * 10)
+
+    def bench_key_press_replay(self):
+        from PyQt6.QtCore import Qt
+
+        event = self._key_event(Qt.Key.Key_R, "r")
+        return measure(lambda: self.popup.keyPressEvent(event), self.iterations * 10)
+
+    def bench_key_press_show_answer(self):
+        from PyQt6.QtCore import Qt
+
+        event = self._key_event(Qt.Key.Key_Space, " ")
+
+        def run():
+            self.popup.answer_shown = False
+            self.popup.keyPressEvent(event)
+        return measure(run, self.iterations)
+
+    def run(self, selected=None):
+        results = {}
+        for name in sorted(dir(self)):
+            if not name.startswith("bench_"):
+                continue
+            short = name[len("bench_"):]
+            if selected and short not in selected:
+                continue
+            print(f"running {short}...", file=sys.stderr)
+            results[short] = summarize(getattr(self, name)())
+        return results
+
+
+def compare(results, baseline):
+    """Print the median ratio of each benchmark against a previous run."""
+    print(f"{'benchmark':32} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, stats in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        ratio = stats["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        print(f"{name:32} {old['median_ms']:12.3f} {stats['median_ms']:12.3f} {ratio:8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--cards", type=int, default=20, help="number of stand-in cards")
+    parser.add_argument("--text-size", type=int, default=2000, help="characters of card text")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("benchmarks", nargs="*", help="subset of benchmarks to run")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        media_dir = os.path.join(workdir, "collection.media")
+        os.makedirs(media_dir)
+        collection = standin.StubCollection(
+            standin.make_cards(args.cards, args.text_size, args.text_size * 2), media_dir
+        )
+        mw = standin.StubMainWindow(collection)
+        standin.install(mw)
+        package = standin.load_addon(workdir)
+
+        benchmarks = PopupBenchmarks(app, mw, package.__name__, args.iterations)
+        results = benchmarks.run(set(args.benchmarks))
+        benchmarks.popup.hide()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "cards": args.cards,
+            "text_size": args.text_size,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Replay a recorded review session headlessly and report latencies.
+
+Sessions are recorded from the popup's context menu ("Record Session") and
+saved to the addon's ``user_files/sessions`` folder. Replay drives
+``FloatCardPopup`` and ``FloatCardScheduler`` with the recorded key presses,
+showQuestion hooks and scheduler ticks, serving the recorded card HTML from a
+stand-in collection::
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/replay_session.py session.json -o replay.json
+    QT_QPA_PLATFORM=offscreen python benchmarks/replay_session.py session.json --speed 1
+
+With ``--speed 0`` (the default) events are replayed as fast as possible;
+otherwise the recorded gaps are kept, scaled by the given factor.
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standin  # noqa: E402
+from bench_popup import summarize, wait_for_load  # noqa: E402
+
+
+def load_session(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_cards(session):
+    """Build stand-in cards serving the recorded HTML, keyed by card id."""
+    cards = {}
+    for card_id, data in session["cards"].items():
+        note_type = standin.StubNoteType(id=0, name=data.get("note_type", ""))
+        cards[int(card_id)] = standin.StubCard(int(card_id), data["q"], data["a"], data.get("css", ""),
+                                               note_type=note_type)
+    return cards
+
+
+def key_label(event):
+    text = event.get("text") or ""
+    if text == " ":
+        return "key:space"
+    if text.strip():
+        return f"key:{text.lower()}"
+    return f"key:{event['key']}"
+
+
+def manual_timer():
+    """A scheduler timer that never fires, so only the recorded ticks show cards."""
+    from PyQt6.QtCore import QTimer
+
+    class ManualTimer(QTimer):
+        def start(self, *args):
+            pass
+
+    return ManualTimer()
+
+
+class SessionReplay:
+    def __init__(self, app, session, workdir, speed=0.0):
+        self.app = app
+        self.events = session["events"]
+        self.speed = speed
+        self.cards = build_cards(session)
+
+        media_dir = os.path.join(workdir, "collection.media")
+        os.makedirs(media_dir, exist_ok=True)
+        self.collection = standin.StubCollection(list(self.cards.values()), media_dir)
+        self.mw = standin.StubMainWindow(self.collection)
+        self.mw.reviewer.auto_advance = False
+        first_card = next((e["card_id"] for e in self.events if e.get("card_id") in self.cards), None)
+        if first_card is not None:
+            self._select_card(first_card)
+        standin.install(self.mw)
+        package = standin.load_addon(workdir)
+
+        gui = importlib.import_module(f"{package.__name__}.gui")
+        scheduler_module = importlib.import_module(f"{package.__name__}.scheduler")
+        self.popup = gui.FloatCardPopup(self.mw)
+        self.scheduler = scheduler_module.FloatCardScheduler(
+            self.popup.show_popup, timer_factory=manual_timer, poll_timer_factory=manual_timer
+        )
+        self.scheduler.current_deck = "Default"
+        # Enabled like a running schedule, without the card start_schedule shows right away
+        self.scheduler.show_on_start = False
+        self.scheduler.start_schedule()
+        self.popup.show()
+        self.app.processEvents()
+
+    def _select_card(self, card_id):
+        card = self.cards.get(card_id)
+        if card is None:
+            return
+        self.collection.position = self.collection.cards.index(card)
+        self.mw.reviewer.card = card
+
+    def _key_event(self, event):
+        from PyQt6.QtCore import QEvent, Qt
+        from PyQt6.QtGui import QKeyEvent
+
+        return QKeyEvent(QEvent.Type.KeyPress, event["key"], Qt.KeyboardModifier(event["modifiers"]),
+                         event.get("text", ""))
+
+    def _dispatch(self, event):
+        """Run one recorded event and return its label."""
+        if event["type"] == "key":
+            self.popup.keyPressEvent(self._key_event(event))
+            return key_label(event)
+        if event["type"] == "hook":
+            self._select_card(event.get("card_id"))
+            if self.popup.isVisible():
+                self.popup.update_card()
+            return "hook:showQuestion"
+        if event["type"] == "tick":
+            self.scheduler.exec_schedule()
+            return "tick"
+        return None
+
+    def run(self):
+        samples = {}
+        started = time.perf_counter()
+        for event in self.events:
+            if self.speed:
+                due = started + event["t"] / self.speed
+                while time.perf_counter() < due:
+                    self.app.processEvents()
+
+            begin = time.perf_counter()
+            label = self._dispatch(event)
+            if label is None:
+                continue
+            # Include the page load when the event triggered a render
+            if self.popup.card_costs.pending is not None:
+                wait_for_load(self.popup, self.app)
+            samples.setdefault(label, []).append(time.perf_counter() - begin)
+
+        total = time.perf_counter() - started
+        results = {label: summarize(values) for label, values in sorted(samples.items())}
+        return results, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("session", help="recorded session JSON file")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="replay speed factor; 0 replays as fast as possible")
+    parser.add_argument("-o", "--output", default="replay_results.json")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    session = load_session(args.session)
+    with tempfile.TemporaryDirectory() as workdir:
+        replay = SessionReplay(app, session, workdir, args.speed)
+        results, total = replay.run()
+        replay.popup.hide()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "session": os.path.basename(args.session),
+            "events": len(session["events"]),
+            "speed": args.speed,
+            "total_s": round(total, 3),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"{'event':24} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for label, stats in results.items():
+        print(f"{label:24} {stats['count']:6} {stats['median_ms']:10.3f} {stats['p95_ms']:10.3f} {stats['max_ms']:10.3f}")
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Virtual-clock soak test for FloatCardScheduler.
+
+Simulates days of scheduled pop-ups in seconds: the scheduler is given a
+virtual clock and timer, so every timer wakeup jumps straight to its due
+time. The run exercises restarts through ``update_state``, backing off while
+the stand-in deck runs dry (it does periodically) and config changes, then reports
+tick accuracy, render counts, leaked objects and peak memory::
+
+    python benchmarks/soak_scheduler.py --days 7 --frequency 10 -o soak.json
+
+Only QtCore is needed; no window is shown unless ``--with-popup`` is given.
+"""
+
+import argparse
+import collections
+import gc
+import heapq
+import importlib
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standin  # noqa: E402
+
+
+class VirtualClock:
+    """A clock that only moves when timers are run."""
+
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+        self.queue = []  # (due, seq, timer, generation)
+        self.seq = itertools.count()
+
+    def __call__(self):
+        return self.now
+
+    def schedule(self, timer, delay_ms):
+        heapq.heappush(self.queue, (self.now + delay_ms / 1000, next(self.seq), timer, timer.generation))
+
+    def advance(self, seconds):
+        """Let time pass without firing timers, e.g. to simulate slow work."""
+        self.now += seconds
+
+    def run_until(self, end, on_fire=None):
+        """Fire due timers in order until ``end`` or until no timer is armed."""
+        while self.queue and self.queue[0][0] <= end:
+            due, _, timer, generation = heapq.heappop(self.queue)
+            if generation != timer.generation or not timer.active:
+                continue  # stopped or re-armed since
+            self.now = max(self.now, due)
+            if on_fire:
+                on_fire(due, self.now)
+            timer.fire()
+        self.now = max(self.now, end)
+
+
+class VirtualSignal:
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self):
+        for slot in list(self.slots):
+            slot()
+
+
+class VirtualTimer:
+    """The subset of QTimer the scheduler uses, driven by a VirtualClock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.timeout = VirtualSignal()
+        self.single_shot = False
+        self.interval = 0
+        self.active = False
+        self.generation = 0
+
+    def setSingleShot(self, single_shot):
+        self.single_shot = single_shot
+
+    def isActive(self):
+        return self.active
+
+    def start(self, msec=None):
+        if msec is not None:
+            self.interval = msec
+        self.generation += 1
+        self.active = True
+        self.clock.schedule(self, self.interval)
+
+    def stop(self):
+        self.generation += 1
+        self.active = False
+
+    def fire(self):
+        if self.single_shot:
+            self.active = False
+        else:
+            self.clock.schedule(self, self.interval)
+        self.timeout.emit()
+
+
+class DryingCollection(standin.StubCollection):
+    """Stand-in collection whose deck is empty during part of every day."""
+
+    def __init__(self, cards, media_dir, clock, empty_hours):
+        super().__init__(cards, media_dir)
+        self.clock = clock
+        self.empty_hours = empty_hours
+
+    def peek_card(self):
+        hour = int(self.clock() // 3600) % 24
+        if hour < self.empty_hours:
+            return None
+        return super().peek_card()
+
+
+def type_counts():
+    counts = collections.Counter(type(o).__name__ for o in gc.get_objects())
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, default=3.0)
+    parser.add_argument("--frequency", type=int, default=5, help="scheduling frequency in minutes")
+    parser.add_argument("--empty-hours", type=int, default=2,
+                        help="hours per day during which the deck has no cards")
+    parser.add_argument("--restart-every", type=float, default=6.0,
+                        help="hours between update_state restarts (simulated config changes)")
+    parser.add_argument("--work-ms", type=float, default=50.0,
+                        help="virtual time each pop-up takes to show")
+    parser.add_argument("--with-popup", action="store_true", help="render through a real FloatCardPopup")
+    parser.add_argument("-o", "--output", default="soak_results.json")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    if args.with_popup:
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv)
+    else:
+        from PyQt6.QtCore import QCoreApplication
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    clock = VirtualClock()
+    wall_started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        media_dir = os.path.join(workdir, "collection.media")
+        os.makedirs(media_dir)
+        collection = DryingCollection(standin.make_cards(50), media_dir, clock, args.empty_hours)
+        mw = standin.StubMainWindow(collection)
+        if args.with_popup:
+            standin.install(mw)
+        else:
+            standin.install(mw, webengine=False)
+        package = standin.load_addon(workdir)
+        scheduler_module = importlib.import_module(f"{package.__name__}.scheduler")
+
+        renders = []
+        if args.with_popup:
+            popup = importlib.import_module(f"{package.__name__}.gui").FloatCardPopup(mw)
+
+            def show_card():
+                popup.show_popup()
+                popup.update_card()
+                app.processEvents()
+                popup.hide()
+                renders.append(clock())
+                clock.advance(args.work_ms / 1000)
+        else:
+            def show_card():
+                renders.append(clock())
+                clock.advance(args.work_ms / 1000)
+
+        scheduler = scheduler_module.FloatCardScheduler(
+            show_card, clock=clock, timer_factory=lambda: VirtualTimer(clock),
+            poll_timer_factory=lambda: VirtualTimer(clock)
+        )
+        config = {"scheduling": {"enabled": True, "frequency": args.frequency, "deck": "Default"}}
+
+        gc.collect()
+        tracemalloc.start()
+        baseline_objects = type_counts()
+
+        lateness = []
+
+        def on_fire(due, now):
+            lateness.append(now - due)
+
+        scheduler.update_state(config)
+        end = clock() + args.days * 86400
+        restart_step = args.restart_every * 3600
+        restarts = 0
+        while clock() < end:
+            step_end = min(end, clock() + restart_step)
+            clock.run_until(step_end, on_fire)
+            # Simulated config change
+            scheduler.update_state(config)
+            restarts += 1
+        scheduler.stop_schedule()
+
+        gc.collect()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        grown = type_counts() - baseline_objects
+
+    # Pop-ups during the run should sit on the frequency grid of their start
+    gaps = [b - a for a, b in zip(renders, renders[1:])]
+    on_grid = [g for g in gaps if abs(g - args.frequency * 60) < 1]
+    report = {
+        "meta": {
+            "days": args.days,
+            "frequency_minutes": args.frequency,
+            "empty_hours": args.empty_hours,
+            "restart_every_hours": args.restart_every,
+            "with_popup": args.with_popup,
+            "wall_seconds": round(time.perf_counter() - wall_started, 3),
+        },
+        "ticks": {
+            "fired": scheduler.ticks_fired,
+            "cards_shown": scheduler.cards_shown,
+            "no_card": scheduler.no_card_ticks,
+            "timer_wakeups": len(lateness),
+            "restarts": restarts,
+            "backoffs": scheduler.backoffs,
+        },
+        "accuracy": {
+            "max_timer_lateness_s": max(lateness) if lateness else 0.0,
+            "mean_gap_s": statistics.fmean(gaps) if gaps else 0.0,
+            "on_grid_fraction": len(on_grid) / len(gaps) if gaps else 1.0,
+        },
+        "renders": len(renders),
+        "memory": {
+            "peak_traced_bytes": peak,
+            "grown_object_types": dict(grown.most_common(15)),
+        },
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(json.dumps(report, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,438 @@
+"""Local stand-ins for the parts of Anki the add-on touches.
+
+The add-on modules import ``aqt`` and ``anki`` at module level, so they can
+only be loaded inside a running Anki. The classes here provide just enough of
+``aqt.mw`` (reviewer, card, collection, profile manager, add-on manager) to
+drive ``FloatCardPopup``, ``Config`` and ``FloatCardScheduler`` headlessly,
+e.g. with ``QT_QPA_PLATFORM=offscreen``.
+
+The add-on is always loaded from a scratch copy (see ``load_addon``) so that
+benchmarks never touch the real ``config.json`` or ``logs`` directory.
+"""
+
+import glob
+import os
+import shutil
+import sys
+import types
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "float_cards"
+
+SAMPLE_QUESTION = """
+<style>.card {{ font-family: arial; font-size: 20px; }}</style>
+<div id="qa"><div class="front">{text}</div>[anki:play:q:0]</div>
+"""
+
+SAMPLE_ANSWER = """
+<style>.card {{ font-family: arial; font-size: 20px; }}</style>
+<div id="qa"><div class="front">{text}</div><hr id=answer>
+<div class="back">{back}</div>[anki:play:a:0] [anki:play:a:1]</div>
+"""
+
+SAMPLE_CSS = ".card { font-family: arial; font-size: 20px; text-align: center; }"
+
+
+class StubNoteType(dict):
+    """Minimal note type: a dict with an ``id`` and ``name``."""
+
+
+class StubCard:
+    """A card with fixed question/answer HTML."""
+
+    def __init__(self, card_id, question, answer, css=SAMPLE_CSS, did=1, note_type=None):
+        self.id = card_id
+        self.nid = card_id
+        self.note_id = card_id  # As on the backend card message
+        self.did = did
+        self.ord = 0
+        self.queue = 2
+        self._question = question
+        self._answer = answer
+        self._css = css
+        self._note_type = note_type or StubNoteType(id=1, name="Basic")
+
+    def q(self):
+        return self._question
+
+    def a(self):
+        return self._answer
+
+    def question(self, reload=False):
+        return self._question
+
+    def answer(self):
+        return self._answer
+
+    def css(self):
+        return self._css
+
+    def note_type(self):
+        return self._note_type
+
+    def start_timer(self):
+        pass
+
+
+class StubDeckNameId:
+    def __init__(self, name, deck_id):
+        self.name = name
+        self.id = deck_id
+
+
+class StubDecks:
+    """Deck manager with a flat list of named decks."""
+
+    def __init__(self, names=("Default",)):
+        self._decks = {name: {"id": i + 1, "name": name} for i, name in enumerate(names)}
+        self._current = next(iter(self._decks.values()))
+
+    def by_name(self, name):
+        return self._decks.get(name)
+
+    def current(self):
+        return self._current
+
+    def get_current_id(self):
+        return self._current["id"]
+
+    def select(self, deck_id):
+        for deck in self._decks.values():
+            if deck["id"] == deck_id:
+                self._current = deck
+                return
+
+    def deck_and_child_ids(self, deck_id):
+        return [deck_id]
+
+    def all_names_and_ids(self):
+        return [StubDeckNameId(d["name"], d["id"]) for d in self._decks.values()]
+
+
+class StubScheduler:
+    """Collection scheduler serving cards from a list, cycling forever."""
+
+    def __init__(self, collection):
+        self.col = collection
+
+    def getCard(self):
+        return self.col.peek_card()
+
+    def get_queued_cards(self, fetch_limit=1, intraday_learning_only=False):
+        cards = self.col.cards
+        if not cards:
+            return types.SimpleNamespace(cards=[])
+        queued = [
+            types.SimpleNamespace(card=cards[(self.col.position + i) % len(cards)], states=None)
+            for i in range(min(fetch_limit, len(cards)))
+        ]
+        return types.SimpleNamespace(cards=queued)
+
+    def get_scheduling_states(self, card_id):
+        return None
+
+    def deck_due_tree(self, deck_id=None):
+        due = 1 if self.col.peek_card() else 0
+        if deck_id is not None:
+            return types.SimpleNamespace(deck_id=deck_id, new_count=0, learn_count=0, review_count=due, children=[])
+        children = [
+            types.SimpleNamespace(deck_id=d.id, new_count=0, learn_count=0, review_count=due, children=[])
+            for d in self.col.decks.all_names_and_ids()
+        ]
+        return types.SimpleNamespace(deck_id=0, new_count=0, learn_count=0, review_count=due, children=children)
+
+    def build_answer(self, card, states, rating):
+        return (card, rating)
+
+    def answer_card(self, answer):
+        self.col.answers.append(answer)
+        self.col.next_card()
+
+
+class StubMedia:
+    def __init__(self, media_dir):
+        self._dir = media_dir
+
+    def dir(self):
+        return self._dir
+
+
+class StubCollection:
+    """Collection holding an ordered list of cards."""
+
+    def __init__(self, cards, media_dir, deck_names=("Default",)):
+        self.cards = list(cards)
+        self.position = 0
+        self.decks = StubDecks(deck_names)
+        self.sched = StubScheduler(self)
+        self.media = StubMedia(media_dir)
+        self.answers = []
+
+    def peek_card(self):
+        if not self.cards:
+            return None
+        return self.cards[self.position % len(self.cards)]
+
+    def next_card(self):
+        self.position += 1
+        return self.peek_card()
+
+    def find_cards(self, query):
+        """Every search matches the whole collection."""
+        if query.startswith("cid:"):
+            card_id = int(query[4:].split()[0])
+            return [card.id for card in self.cards if card.id == card_id]
+        return [card.id for card in self.cards]
+
+    def get_card(self, card_id):
+        for card in self.cards:
+            if card.id == card_id:
+                return card
+        raise KeyError(card_id)
+
+
+class StubReviewer:
+    """Reviewer that advances through the collection and fires showQuestion.
+
+    With ``auto_advance`` off, answering only records the ease and the
+    caller decides which card comes next (used by session replay).
+    """
+
+    def __init__(self, mw, auto_advance=True):
+        self.mw = mw
+        self.card = None
+        self.state = "question"
+        self.auto_advance = auto_advance
+        self.answers = []
+
+    def _showAnswer(self):
+        self.state = "answer"
+
+    def _answerCard(self, ease):
+        self.answers.append(ease)
+        self.state = "question"
+        if self.auto_advance:
+            self.card = self.mw.col.next_card()
+            run_hook("showQuestion")
+
+
+class StubProfileManager:
+    def __init__(self, night_mode=True):
+        self._night_mode = night_mode
+
+    def night_mode(self):
+        return self._night_mode
+
+
+class StubAddonManager:
+    def __init__(self):
+        self.configs = {}
+
+    def getConfig(self, module):
+        return self.configs.get(module)
+
+    def writeConfig(self, module, config):
+        self.configs[module] = config
+
+    def setConfigUpdatedAction(self, module, func):
+        pass
+
+
+class StubMainWindow:
+    """Just enough of ``aqt.mw`` for the add-on's popup, config and scheduler."""
+
+    def __init__(self, collection, night_mode=True):
+        self.col = collection
+        self.pm = StubProfileManager(night_mode)
+        self.addonManager = StubAddonManager()
+        self.reviewer = StubReviewer(self)
+        self.reviewer.card = collection.peek_card()
+        self.state = "review"
+
+    def onOverview(self):
+        self.state = "overview"
+
+    def moveToState(self, state):
+        self.state = state
+        if state == "review":
+            self.reviewer.card = self.col.peek_card()
+
+    def showMinimized(self):
+        pass
+
+
+def make_cards(count, text_size=200, back_size=400):
+    """Build ``count`` cards with roughly ``text_size``/``back_size`` chars of text."""
+    cards = []
+    for i in range(count):
+        text = (f"Question {i} " * (text_size // 12 + 1))[:text_size]
+        back = (f"Answer {i} " * (back_size // 10 + 1))[:back_size]
+        question = SAMPLE_QUESTION.format(text=text)
+        answer = SAMPLE_ANSWER.format(text=text, back=back)
+        cards.append(StubCard(1000 + i, question, answer))
+    return cards
+
+
+_hooks = {}
+
+
+def run_hook(name, *args):
+    for func in list(_hooks.get(name, [])):
+        func(*args)
+
+
+def _add_hook(name, func):
+    _hooks.setdefault(name, []).append(func)
+
+
+def _remove_hook(name, func):
+    if func in _hooks.get(name, []):
+        _hooks[name].remove(func)
+
+
+def _wrap(old, new, pos="after"):
+    def wrapped(*args, **kwargs):
+        if pos == "before":
+            new(*args, **kwargs)
+            return old(*args, **kwargs)
+        result = old(*args, **kwargs)
+        new(*args, **kwargs)
+        return result
+    return wrapped
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class StubOp:
+    """Collection/query op that runs synchronously on the calling thread."""
+
+    def __init__(self, parent=None, op=None, success=None):
+        self._op = op
+        self._success = success
+        self._failure = None
+
+    def success(self, callback):
+        self._success = callback
+        return self
+
+    def failure(self, callback):
+        self._failure = callback
+        return self
+
+    def run_in_background(self, initiator=None):
+        try:
+            result = self._op(sys.modules["aqt"].mw.col)
+        except Exception as e:
+            if self._failure is None:
+                raise
+            self._failure(e)
+            return
+        if self._success:
+            self._success(result)
+
+
+def install(mw, webengine=True):
+    """Register stand-in ``aqt``/``anki`` modules bound to ``mw`` in ``sys.modules``.
+
+    With ``webengine`` off, QtWebEngine is not imported; enough for the
+    scheduler and config modules, but not for the popup.
+    """
+    from PyQt6 import QtCore, QtGui, QtWidgets
+    if webengine:
+        from PyQt6.QtWebEngineWidgets import QWebEngineView
+    else:
+        QWebEngineView = None
+
+    qt = types.ModuleType("aqt.qt")
+    for source in (QtCore, QtGui, QtWidgets):
+        for name in dir(source):
+            if not name.startswith("_"):
+                setattr(qt, name, getattr(source, name))
+
+    utils = types.ModuleType("aqt.utils")
+    utils.tooltip = _noop
+    utils.showWarning = _noop
+    utils.showInfo = _noop
+    utils.qconnect = lambda signal, func: signal.connect(func)
+
+    webview = types.ModuleType("aqt.webview")
+    webview.AnkiWebView = QWebEngineView
+
+    sound = types.ModuleType("aqt.sound")
+    sound.play_clicked_audio = _noop
+
+    operations = types.ModuleType("aqt.operations")
+    operations.CollectionOp = StubOp
+    operations.QueryOp = StubOp
+
+    dialogs = types.SimpleNamespace(open=_noop)
+    gui_hooks = types.SimpleNamespace(
+        reviewer_did_answer_card=[], operation_did_execute=[], collection_did_load=[], sync_did_finish=[]
+    )
+
+    aqt = types.ModuleType("aqt")
+    aqt.mw = mw
+    aqt.dialogs = dialogs
+    aqt.gui_hooks = gui_hooks
+    aqt.qt = qt
+    aqt.utils = utils
+    aqt.webview = webview
+    aqt.sound = sound
+    aqt.operations = operations
+
+    hooks = types.ModuleType("anki.hooks")
+    hooks.addHook = _add_hook
+    hooks.remHook = _remove_hook
+    hooks.runHook = run_hook
+    hooks.wrap = _wrap
+    hooks.note_will_flush = []
+
+    cards = types.ModuleType("anki.cards")
+    # Queued cards already are stand-in cards
+    cards.Card = lambda col, id=None, backend_card=None: backend_card or col.get_card(id)
+
+    v3 = types.ModuleType("anki.scheduler.v3")
+    v3.CardAnswer = types.SimpleNamespace(AGAIN=0, HARD=1, GOOD=2, EASY=3)
+    scheduler = types.ModuleType("anki.scheduler")
+    scheduler.v3 = v3
+
+    anki = types.ModuleType("anki")
+    anki.hooks = hooks
+    anki.cards = cards
+    anki.scheduler = scheduler
+
+    sys.modules.update({
+        "aqt": aqt,
+        "aqt.qt": qt,
+        "aqt.utils": utils,
+        "aqt.webview": webview,
+        "aqt.sound": sound,
+        "aqt.operations": operations,
+        "anki": anki,
+        "anki.hooks": hooks,
+        "anki.cards": cards,
+        "anki.scheduler": scheduler,
+        "anki.scheduler.v3": v3,
+    })
+
+
+def load_addon(workdir, addon_dir=ADDON_DIR):
+    """Copy the add-on into ``workdir`` and register it as a package.
+
+    The package ``__init__`` is not executed (it builds the popup and touches
+    Anki's menus at import time); submodules are imported on demand, e.g.
+    ``importlib.import_module("float_cards.gui")``.
+    """
+    target = os.path.join(workdir, PACKAGE_NAME)
+    os.makedirs(target, exist_ok=True)
+    for path in glob.glob(os.path.join(addon_dir, "*.py")):
+        shutil.copy(path, target)
+    shutil.copy(os.path.join(addon_dir, "config.json"), target)
+
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [target]
+    package.__file__ = os.path.join(target, "__init__.py")
+    sys.modules[PACKAGE_NAME] = package
+    return package
@@ -0,0 +1,192 @@
+"""The popup's own queue of upcoming cards.
+
+Cards are fetched from the v3 scheduler queue in one `get_queued_cards` call
+per batch rather than one per grade. When fewer than `low_water` cards are
+left, the queue refills once the event loop is idle. Anything that changes
+the study queues behind the popup's back, such as an undo or an answer given
+in the main window, empties it (see invalidation.py), so the next card comes
+from a fresh fetch.
+
+Refills run as a QueryOp on Anki's background thread when the popup's deck is
+the collection's current one. Fetching another deck means selecting it for
+the duration of the fetch, which only the main thread may do, so those
+refills and an empty queue whose next card is needed right away are fetched
+on the main thread.
+"""
+
+import collections
+from PyQt6.QtCore import QTimer
+from aqt import mw
+from aqt.operations import QueryOp
+
+from .logger import setup_logger
+from .watchdog import operation, tracked
+from .invalidation import bus, STUDY_QUEUES, DAY, COLLECTION
+
+# Get logger
+logger = setup_logger()
+
+# Card queues whose cards are being learned: an answer may bring them back soon
+LEARNING_QUEUES = (1, 3)
+
+class CardQueue:
+    """Upcoming cards of one deck, fetched in batches from the collection scheduler."""
+
+    def __init__(self, batch_size=10, low_water=3):
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self.deck_id = None
+        # QueuedCard messages (backend card + scheduling states), next card first
+        self.entries = collections.deque()
+        # The card handed out by pop() and not answered yet
+        self.taken_id = None
+        self.refill_pending = False
+        self.fetches = 0
+        # Bumped whenever the queue changes under a background refill, which then discards its batch
+        self.generation = 0
+        # The popup's own answers are accounted for in answered()
+        bus.register("card_queue", self.evict, (STUDY_QUEUES, DAY), owner=self)
+
+    def update_state(self, config):
+        queue_config = config.get('card_queue', {})
+        self.batch_size = max(1, queue_config.get('batch_size', 10))
+        self.low_water = min(max(0, queue_config.get('low_water', 3)), self.batch_size - 1)
+
+    def set_deck(self, deck_id):
+        """Serve cards from `deck_id`, dropping any queued from another deck."""
+        if deck_id != self.deck_id:
+            self.deck_id = deck_id
+            self.reset()
+
+    def invalidate(self):
+        """Drop the queued cards; the next pop() fetches a fresh batch."""
+        self.entries.clear()
+        self.generation += 1
+
+    def reset(self):
+        self.invalidate()
+        self.taken_id = None
+
+    def release(self):
+        """Give back a card taken with pop() that will not be answered."""
+        if self.taken_id is not None:
+            # It is no longer in the queue, but still first in the scheduler's
+            self.reset()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def peek(self, count):
+        """The next `count` queued cards, fetching a batch if the queue is empty."""
+        if not self.entries:
+            self.fetch()
+        return [entry.card for entry in list(self.entries)[:count]]
+
+    def pop(self):
+        """Take the next card.
+
+        Returns:
+            (Card, scheduling states), or None if nothing is due in the deck
+        """
+        from anki.cards import Card
+
+        if not self.entries:
+            self.fetch()
+        if not self.entries:
+            return None
+        entry = self.entries.popleft()
+        self.taken_id = entry.card.id
+        if len(self.entries) < self.low_water:
+            self._schedule_refill()
+        return Card(mw.col, backend_card=entry.card), entry.states
+
+    def answered(self, card, ease):
+        """Account for the popup answering `card`, which it took with pop()."""
+        self.taken_id = None
+        # A batch fetched before the answer may still hold the card or its siblings
+        self.generation += 1
+        # `card` was loaded before the answer; its queue now may be a learning one
+        if ease == 1 or mw.col.get_card(card.id).queue in LEARNING_QUEUES:
+            # The card may be due again before the queued ones
+            self.invalidate()
+            return
+        # Siblings may have been buried by the answer
+        note_id = card.nid
+        self.entries = collections.deque(entry for entry in self.entries if entry.card.note_id != note_id)
+
+    @tracked("card_queue.fetch")
+    def fetch(self):
+        """Replace the queue with a fresh batch from the collection scheduler."""
+        self.refill_pending = False
+        with operation("col.sched.get_queued_cards"):
+            queued = self._fetch_batch(mw.col, self.deck_id, self.batch_size)
+        self._apply_batch(queued)
+
+    @staticmethod
+    def _fetch_batch(col, deck_id, batch_size):
+        """The next `batch_size` queued cards of `deck_id`, selecting it meanwhile; main thread only."""
+        old_deck_id = col.decks.get_current_id()
+        switch = deck_id is not None and deck_id != old_deck_id
+        try:
+            if switch:
+                col.decks.select(deck_id)
+            return col.sched.get_queued_cards(fetch_limit=batch_size)
+        finally:
+            if switch:
+                col.decks.select(old_deck_id)
+
+    def _apply_batch(self, queued):
+        self.fetches += 1
+        self.generation += 1
+        # The taken card is still at the top of the scheduler's queue until answered
+        self.entries = collections.deque(entry for entry in queued.cards if entry.card.id != self.taken_id)
+
+    def _schedule_refill(self):
+        if not self.refill_pending:
+            self.refill_pending = True
+            QTimer.singleShot(0, self._refill)
+
+    def _refill(self):
+        if not self.refill_pending:
+            return  # Fetched synchronously in the meantime
+        deck_id, batch_size, generation = self.deck_id, self.batch_size, self.generation
+        if deck_id is not None and deck_id != mw.col.decks.get_current_id():
+            self.fetch()
+            return
+        QueryOp(
+            parent=mw,
+            op=lambda col: self._fetch_current(col, deck_id, batch_size),
+            success=lambda queued: self._on_refilled(queued, generation)
+        ).failure(self._on_refill_failed).run_in_background()
+
+    @staticmethod
+    def _fetch_current(col, deck_id, batch_size):
+        """The next `batch_size` queued cards of the current deck, or None if it is no longer `deck_id`.
+
+        Runs on a background thread, so it never selects a deck.
+        """
+        if deck_id is not None and deck_id != col.decks.get_current_id():
+            return None
+        return col.sched.get_queued_cards(fetch_limit=batch_size)
+
+    def _on_refilled(self, queued, generation):
+        if not self.refill_pending:
+            return  # Fetched synchronously in the meantime
+        self.refill_pending = False
+        if queued is None or generation != self.generation:
+            # Answered, invalidated or the current deck changed while fetching: the batch may be out of date
+            if len(self.entries) < self.low_water:
+                self._schedule_refill()
+            return
+        self._apply_batch(queued)
+
+    def _on_refill_failed(self, error):
+        self.refill_pending = False
+        logger.debug(f"Could not refill the card queue: {error}")
+
+    def evict(self, scope, keys):
+        if scope == COLLECTION:
+            self.reset()
+        elif self.entries:
+            logger.debug(f"Card queue invalidated ({scope})")
+            self.invalidate()
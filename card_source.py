@@ -0,0 +1,132 @@
+"""Scheduled cards from a search instead of a deck.
+
+`scheduling.search` (or a schedule's own `search`) takes any browser search,
+e.g. "tag:verbs is:due". The matching card ids are kept as an array of
+64-bit integers and refreshed in the background:
+
+- edits to known notes re-run the search for those notes only;
+- other changes mark the result stale, and it is searched again at most
+  every MIN_REFRESH_SECONDS;
+- in between, each sampled card is checked against the search on its own,
+  and cards that stopped matching are dropped in O(1).
+
+Only headless review mode can show an arbitrary card, so a search is
+ignored in reviewer mode.
+"""
+
+import random
+import time
+from array import array
+from aqt import mw
+from aqt.operations import QueryOp
+
+from .logger import setup_logger
+from .invalidation import bus, CARD, NOTE, NOTETYPE, DECK, STUDY_QUEUES, DAY, COLLECTION
+
+# Get logger
+logger = setup_logger()
+
+# Least time between two full searches while the collection keeps changing
+MIN_REFRESH_SECONDS = 300
+# Stale ids tried before sample() gives up
+MAX_SAMPLE_TRIES = 20
+
+class SearchCardSource:
+    """Card ids matching a search, cached between scheduled popups."""
+
+    def __init__(self, query):
+        self.query = query
+        self.ids = array('q')
+        self.loaded_at = None
+        self.stale = True
+        # Notes edited since the last search, re-searched on their own
+        self.changed_notes = set()
+        self.last_id = None
+        self.searches = 0
+        bus.register(f"card_source:{query}", self.evict, (CARD, NOTE, NOTETYPE, DECK, STUDY_QUEUES, DAY))
+
+    def evict(self, scope, keys):
+        if scope == COLLECTION:
+            self.ids = array('q')
+            self.loaded_at = None
+            self.changed_notes.clear()
+        elif scope == NOTE and keys is not None:
+            self.changed_notes |= keys
+        else:
+            self.stale = True
+
+    def _needs_full_search(self):
+        if self.loaded_at is None:
+            return True
+        if not self.stale:
+            return False
+        return not self.ids or time.time() - self.loaded_at >= MIN_REFRESH_SECONDS
+
+    def refresh(self, on_done, on_failed):
+        """Bring the ids up to date in the background if needed, then call `on_done(count)`."""
+        full = self._needs_full_search()
+        # Changes reported while the search runs are kept for the next refresh
+        notes = set(self.changed_notes)
+        if not full and not notes:
+            on_done(len(self.ids))
+            return
+        if full:
+            self.stale = False
+
+        def failed(error):
+            if full:
+                self.stale = True
+            on_failed(error)
+
+        QueryOp(
+            parent=mw,
+            op=lambda col: self._search(col, full, notes),
+            success=lambda result: self._apply(result, full, notes, on_done)
+        ).failure(failed).run_in_background()
+
+    def _search(self, col, full, notes):
+        """Run on a background thread."""
+        if full:
+            return array('q', col.find_cards(self.query))
+        note_ids = ",".join(str(nid) for nid in notes)
+        return set(col.find_cards(f"nid:{note_ids}")), col.find_cards(f"({self.query}) nid:{note_ids}")
+
+    def _apply(self, result, full, notes, on_done):
+        self.searches += 1
+        if full:
+            self.ids = result
+            self.loaded_at = time.time()
+            logger.info(f"Search '{self.query}' matches {len(self.ids)} cards")
+        else:
+            note_cards, matches = result
+            self.ids = array('q', (card_id for card_id in self.ids if card_id not in note_cards))
+            self.ids.extend(matches)
+        self.changed_notes -= notes
+        on_done(len(self.ids))
+
+    def sample(self):
+        """A random matching card id, checked against the search, or None if none is left."""
+        for _ in range(MAX_SAMPLE_TRIES):
+            if not self.ids:
+                return None
+            index = random.randrange(len(self.ids))
+            card_id = self.ids[index]
+            if card_id == self.last_id and len(self.ids) > 1:
+                continue  # Don't show the card that was just answered again
+            if mw.col.find_cards(f"cid:{card_id} ({self.query})"):
+                self.last_id = card_id
+                return card_id
+            # No longer matches, e.g. no longer due after an answer: swap with the last and drop it
+            self.ids[index] = self.ids[-1]
+            self.ids.pop()
+        self.stale = True
+        return None
+
+# One source per search, shared by schedules and kept across config changes
+_sources = {}
+
+def get_source(query):
+    """The cached source for `query`."""
+    if query not in _sources:
+        _sources[query] = SearchCardSource(query)
+    return _sources[query]
@@ -0,0 +1,123 @@
+"""Per-card render cost tracking for the float card popup."""
+
+import heapq
+import json
+import os
+import re
+import time
+
+from .config import get_user_files_dir
+from .logger import setup_logger
+
+# Get logger
+logger = setup_logger()
+
+# Media references in rendered card HTML: src/href attributes and sound tags
+MEDIA_PATTERN = re.compile(r'''(?:src|href)\s*=\s*["']?[^"'\s>]+|\[sound:[^\]]+\]|\[anki:play:[aq]:\d+\]''', re.IGNORECASE)
+MATHJAX_PATTERN = re.compile(r'\\\(|\\\[')
+
+class CardCostTracker:
+    """Measure how expensive each card is to render and keep the worst N.
+
+    The worst offenders are kept in a bounded min-heap keyed by card id, so
+    recording a measurement is O(log N) and memory stays flat no matter how
+    many cards are reviewed. The heap is persisted to user_files so the
+    report covers more than one session.
+    """
+
+    def __init__(self, limit=20, filename="card_costs.json"):
+        self.limit = limit
+        self.path = os.path.join(get_user_files_dir(), filename)
+        self.heap = []  # (render_ms, card_id, entry)
+        self.pending = None
+        self.dirty = False
+        self.load()
+
+    def begin(self, card, html):
+        """Start measuring a render of `card` with the final page `html`."""
+        try:
+            note_type = card.note_type()['name']
+        except Exception:
+            note_type = ""
+        self.pending = {
+            "card_id": card.id,
+            "note_type": note_type,
+            "html_bytes": len(html.encode('utf-8')),
+            "media_refs": len(MEDIA_PATTERN.findall(html)),
+            "mathjax": len(MATHJAX_PATTERN.findall(html)),
+            "started": time.perf_counter(),
+        }
+
+    def finish(self):
+        """Finish the pending measurement once the page has loaded.
+
+        Returns:
+            The recorded entry, or None if nothing was being measured
+        """
+        if self.pending is None:
+            return None
+        entry, self.pending = self.pending, None
+        entry["render_ms"] = round((time.perf_counter() - entry.pop("started")) * 1000, 2)
+        entry["measured_at"] = int(time.time())
+        self.record(entry)
+        return entry
+
+    def cancel(self):
+        """Drop the pending measurement, e.g. when a message replaces the card."""
+        self.pending = None
+
+    def record(self, entry):
+        """Add a measurement to the heap, keeping the worst one per card."""
+        cost = entry["render_ms"]
+        for index, (existing_cost, card_id, _) in enumerate(self.heap):
+            if card_id == entry["card_id"]:
+                if cost > existing_cost:
+                    self.heap[index] = (cost, card_id, entry)
+                    heapq.heapify(self.heap)
+                    self.dirty = True
+                return
+
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, (cost, entry["card_id"], entry))
+            self.dirty = True
+        elif cost > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (cost, entry["card_id"], entry))
+            self.dirty = True
+
+    def worst(self):
+        """Get the recorded entries, most expensive first."""
+        return [entry for _, _, entry in sorted(self.heap, reverse=True)]
+
+    def clear(self):
+        self.heap = []
+        self.dirty = True
+        self.save()
+
+    def load(self):
+        """Load previously persisted measurements."""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for entry in json.load(f):
+                        self.record(entry)
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"Error loading card costs: {str(e)}", exc_info=True)
+
+    def save(self):
+        """Persist the measurements if they changed since the last save."""
+        if not self.dirty:
+            return
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.worst(), f, indent=4)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"Error saving card costs: {str(e)}", exc_info=True)
+
+    def search_query(self):
+        """Build a browser search matching the recorded cards."""
+        card_ids = [str(entry["card_id"]) for entry in self.worst()]
+        return f"cid:{','.join(card_ids)}" if card_ids else ""
@@ -9,6 +9,9 @@ from typing import Any, Dict
 import logging
 
 from .config_schema import CONFIG_SCHEMA
+from .watchdog import tracked
+from .metrics import CONFIG_WRITES
+from .deck_picker import DeckPicker
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +26,7 @@ class Config:
         "position_x": 100,
         "position_y": 100,
         "stay_on_top": True,
+        "review_mode": "reviewer",  # "reviewer" or "headless"
         "buttons": {
             "show_again": True,
             "show_hard": False,
@@ -82,7 +86,8 @@ class Config:
             "replay_sound": "R",
             "replay_second_sound": "Ctrl+R",
             "toggle_scheduling": "Ctrl+Alt+S",
-            "toggle_auto_close": "Ctrl+Alt+A"
+            "toggle_auto_close": "Ctrl+Alt+A",
+            "toggle_profiling": "Ctrl+Alt+P"
         },
         "theme": {
             "light": {
@@ -104,16 +109,59 @@ class Config:
             "enabled": False,
             "frequency": 1,  # Default to 1 minute
             "deck": "Default",
-            "auto_close_on_answer": False
+            "search": "",  # Browser search to take cards from instead of the deck (headless mode)
+            "auto_close_on_answer": False,
+            "mode": "fixed",  # "fixed" or "due_time"
+            "max_backoff_minutes": 240,
+            "active_hours": "",  # e.g. "08:00-22:00"; empty = always
+            "max_defer_minutes": 10,  # Skip a card that Anki is too busy to show for this long
+            "schedules": [],  # Several decks, each with its own frequency; see config.md
+            "collision_delay_minutes": 2,
+            "burst_cards": 1,  # Cards per scheduled popup before it closes
+            "burst_seconds": 0,  # Close a scheduled popup after this long (0 = no limit)
+            "auto_tune": {
+                "enabled": False,
+                "min_frequency": 5,  # Minutes
+                "max_frequency": 120,  # Minutes
+                "target_time": "22:00"  # Finish due cards by this local time
+            }
+        },
+        "card_queue": {
+            "batch_size": 10,  # Cards fetched per call to the collection scheduler
+            "low_water": 3  # Refill when fewer cards than this are queued
+        },
+        "ticker": {
+            "interval_seconds": 20,  # Time each card is shown
+            "deck": "",  # Empty = the current deck
+            "search": "",  # Browser search, used instead of the deck when set
+            "shuffle": True,
+            "prerender": 3  # Cards rendered ahead of the one on screen
         },
         "background": {
             "enabled": False,
             "image_path": "",
             "opacity": 100  # 0-100%
+        },
+        "diagnostics": {
+            "profile_cards": 20,  # Stop profiling after this many cards (0 = no limit)
+            "profile_seconds": 0,  # Stop profiling after this many seconds (0 = no limit)
+            "stall_detector": False,
+            "stall_threshold_ms": 250,
+            "slow_card_limit": 20,
+            "trace_max_mb": 20,
+            "trace_files": 5,
+            "memory_tracker": False,
+            "memory_interval_minutes": 10,
+            "metrics_export": False,
+            "metrics_interval_seconds": 60,  # Minimum 15
+            "metrics_path": "",  # Empty = logs/float_cards.prom
+            "review_history": True,
+            "review_history_flush_seconds": 30
         }
     }
 
     @classmethod
+    @tracked("config.get_config")
     def get_config(cls):
         """Get the addon configuration, creating it if it doesn't exist."""
         addon_dir = os.path.dirname(os.path.abspath(__file__))
@@ -149,6 +197,7 @@ class Config:
             return cls.DEFAULT_CONFIG
 
     @classmethod
+    @tracked("config.save_config")
     def save_config(cls, config):
         """Save the configuration to disk."""
         addon_dir = os.path.dirname(os.path.abspath(__file__))
@@ -167,6 +216,7 @@ class Config:
             # Write the new config
             with open(config_path, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=4, ensure_ascii=False)
+            CONFIG_WRITES.inc()
             
             # Verify the config was written correctly
             try:
@@ -337,18 +387,26 @@ class Config:
         frequency_group.setLayout(frequency_layout)
         scheduling_layout.addRow("Frequency (minutes):", frequency_group)
         
-        deck_selector = QComboBox()
         current_deck = config.get('scheduling', {}).get('deck', "Default")
-        all_decks = mw.col.decks.all_names_and_ids()
-        deck_selector.addItems([d.name for d in all_decks])
-        current_index = deck_selector.findText(current_deck)
-        if current_index >= 0:
-            deck_selector.setCurrentIndex(current_index)
+        deck_selector = DeckPicker(current_deck=current_deck)
         scheduling_layout.addRow("Deck:", deck_selector)
 
         auto_close_checkbox = QCheckBox()
         auto_close_checkbox.setChecked(config.get('scheduling', {}).get('auto_close_on_answer', False))
         scheduling_layout.addRow("Auto-close after answering:", auto_close_checkbox)
+
+        mode_selector = QComboBox()
+        mode_selector.addItem("Fixed interval", "fixed")
+        mode_selector.addItem("Also when learning cards are due", "due_time")
+        mode_index = mode_selector.findData(config.get('scheduling', {}).get('mode', "fixed"))
+        if mode_index >= 0:
+            mode_selector.setCurrentIndex(mode_index)
+        scheduling_layout.addRow("Timing:", mode_selector)
+
+        auto_tune_checkbox = QCheckBox()
+        auto_tune_checkbox.setChecked(config.get('scheduling', {}).get('auto_tune', {}).get('enabled', False))
+        auto_tune_checkbox.setToolTip("Adjust the frequency to finish due cards by the target time with as few popups as possible")
+        scheduling_layout.addRow("Auto-tune frequency:", auto_tune_checkbox)
         
         scheduling_group.setLayout(scheduling_layout)
         general_layout.addWidget(scheduling_group)
@@ -644,7 +702,8 @@ class Config:
             'replay_sound': 'Replay Sound',
             'replay_second_sound': 'Replay Second Sound',
             'toggle_scheduling': 'Toggle Scheduling',
-            'toggle_auto_close': 'Toggle Auto-close'
+            'toggle_auto_close': 'Toggle Auto-close',
+            'toggle_profiling': 'Toggle Profiling'
         }
         
         for key, label in hotkey_fields.items():
@@ -794,8 +853,10 @@ class Config:
                 frequency_minutes = minutes_input.value()
                 current_config['scheduling']['frequency'] = frequency_minutes
                 current_config['scheduling']['enabled'] = scheduling_enabled.isChecked()
-                current_config['scheduling']['deck'] = deck_selector.currentText()
+                current_config['scheduling']['deck'] = deck_selector.current_deck() or current_deck
                 current_config['scheduling']['auto_close_on_answer'] = auto_close_checkbox.isChecked()
+                current_config['scheduling']['mode'] = mode_selector.currentData()
+                current_config['scheduling'].setdefault('auto_tune', {})['enabled'] = auto_tune_checkbox.isChecked()
                 
                 # Update window settings
                 current_config['window_width'] = width_input.value()
@@ -959,6 +1020,16 @@ def write_config(config: Dict[str, Any]) -> None:
     """
     mw.addonManager.writeConfig(__name__.split('.')[0], config)
 
+def get_user_files_dir() -> str:
+    """Get the addon's user_files folder, which Anki keeps across addon updates.
+    
+    Returns:
+        Path to the user_files folder, created if it doesn't exist
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_files")
+    os.makedirs(path, exist_ok=True)
+    return path
+
 def get_default_config() -> Dict[str, Any]:
     """Get the default configuration from schema.
     
@@ -0,0 +1,217 @@
+"""A searchable deck tree shared by the add-on's deck selectors.
+
+The tree is built once from `all_names_and_ids()` and kept until decks are
+added, renamed or removed (see invalidation.py), so dialogs open without
+walking the collection again. New, learn and due counts come from one
+`deck_due_tree()` query on a background thread and are filled in when it
+returns; until then the count columns are empty.
+"""
+
+from PyQt6.QtCore import Qt, QSortFilterProxyModel, QTimer, pyqtSignal
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+from PyQt6.QtWidgets import QAbstractItemView, QHeaderView, QLineEdit, QTreeView, QVBoxLayout, QWidget
+from aqt import mw
+from aqt.operations import QueryOp
+
+from .logger import setup_logger
+from .watchdog import tracked
+from .invalidation import bus, DECK, STUDY_QUEUES, DAY, COLLECTION
+
+# Get logger
+logger = setup_logger()
+
+# Item data of the name column
+FULL_NAME_ROLE = Qt.ItemDataRole.UserRole + 1
+DECK_ID_ROLE = Qt.ItemDataRole.UserRole + 2
+
+COLUMNS = ("Deck", "New", "Learn", "Due")
+# Pause after a keystroke before the tree is filtered
+FILTER_DELAY_MS = 150
+
+class DeckTreeModel(QStandardItemModel):
+    """All decks as a tree, with due counts loaded in the background."""
+
+    def __init__(self):
+        super().__init__()
+        # Name column item of each deck, by full name and by id
+        self.items = {}
+        self.items_by_id = {}
+        self.tree_stale = True
+        self.counts_stale = True
+        self.counts_loading = False
+        self.builds = 0
+        bus.register("deck_picker", self.evict, (DECK, STUDY_QUEUES, DAY))
+
+    def refresh(self):
+        """Rebuild the tree and start loading counts if either is out of date."""
+        if self.tree_stale:
+            self._build()
+        if self.counts_stale and not self.counts_loading:
+            self._load_counts()
+
+    @tracked("deck_picker.build")
+    def _build(self):
+        self.clear()
+        self.setHorizontalHeaderLabels(COLUMNS)
+        self.items = {}
+        self.items_by_id = {}
+        root = self.invisibleRootItem()
+        for deck in sorted(mw.col.decks.all_names_and_ids(), key=lambda d: d.name):
+            parent_name, _, leaf = deck.name.rpartition("::")
+            parent = self.items.get(parent_name, root) if parent_name else root
+            item = QStandardItem(leaf)
+            item.setEditable(False)
+            item.setData(deck.name, FULL_NAME_ROLE)
+            item.setData(deck.id, DECK_ID_ROLE)
+            parent.appendRow([item] + [self._count_item() for _ in COLUMNS[1:]])
+            self.items[deck.name] = item
+            self.items_by_id[deck.id] = item
+        self.tree_stale = False
+        # Counts of a fresh tree are empty until loaded
+        self.counts_stale = True
+        self.builds += 1
+        logger.debug(f"Deck tree built with {len(self.items)} decks")
+
+    @staticmethod
+    def _count_item():
+        item = QStandardItem()
+        item.setEditable(False)
+        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return item
+
+    def _load_counts(self):
+        self.counts_loading = True
+        self.counts_stale = False
+        QueryOp(
+            parent=mw,
+            op=lambda col: self._collect_counts(col.sched.deck_due_tree()),
+            success=self._apply_counts
+        ).failure(self._on_counts_failed).run_in_background()
+
+    @staticmethod
+    def _collect_counts(root):
+        """{deck id: (new, learn, due)} of the whole tree; runs on a background thread."""
+        counts = {}
+        nodes = list(root.children)
+        while nodes:
+            node = nodes.pop()
+            counts[node.deck_id] = (node.new_count, node.learn_count, node.review_count)
+            nodes.extend(node.children)
+        return counts
+
+    def _apply_counts(self, counts):
+        self.counts_loading = False
+        for deck_id, values in counts.items():
+            item = self.items_by_id.get(deck_id)
+            if item is None:
+                continue  # Added after the tree was built; shown on the next build
+            parent = item.parent() or self.invisibleRootItem()
+            for column, value in enumerate(values, start=1):
+                parent.child(item.row(), column).setText(str(value))
+
+    def _on_counts_failed(self, error):
+        self.counts_loading = False
+        self.counts_stale = True
+        logger.error(f"Error loading deck counts: {error}", exc_info=error)
+
+    def evict(self, scope, keys):
+        if scope in (DECK, COLLECTION):
+            self.tree_stale = True
+        self.counts_stale = True
+
+_model = None
+
+def get_deck_model():
+    """The shared deck tree, created on first use."""
+    global _model
+    if _model is None:
+        _model = DeckTreeModel()
+    return _model
+
+class DeckPicker(QWidget):
+    """A filter box over the shared deck tree."""
+
+    # Full name of a double-clicked deck
+    deck_chosen = pyqtSignal(str)
+
+    def __init__(self, parent=None, current_deck=None):
+        super().__init__(parent)
+        self.model = get_deck_model()
+        self.model.refresh()
+
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterRole(FULL_NAME_ROLE)
+        self.proxy.setFilterKeyColumn(0)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        # Keep the parents of matching subdecks
+        self.proxy.setRecursiveFilteringEnabled(True)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter decks...")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.timeout.connect(self._apply_filter)
+        self.filter_edit.textChanged.connect(lambda: self.filter_timer.start(FILTER_DELAY_MS))
+        # Enter goes on to the dialog's default button; filter first so it sees the match
+        self.filter_edit.returnPressed.connect(self._flush_filter)
+
+        self.tree = QTreeView()
+        self.tree.setModel(self.proxy)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.tree.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        header = self.tree.header()
+        header.setStretchLastSection(False)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for column in range(1, len(COLUMNS)):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        self.tree.doubleClicked.connect(lambda index: self._choose_current())
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.filter_edit)
+        layout.addWidget(self.tree)
+        self.setLayout(layout)
+
+        if current_deck:
+            self.set_current_deck(current_deck)
+
+    def _flush_filter(self):
+        if self.filter_timer.isActive():
+            self.filter_timer.stop()
+            self._apply_filter()
+
+    def _apply_filter(self):
+        text = self.filter_edit.text().strip()
+        self.proxy.setFilterFixedString(text)
+        if text:
+            self.tree.expandAll()
+            # Select the first match, not a parent shown for context, so Enter picks it
+            needle = text.lower()
+            if needle not in self.current_deck().lower():
+                match = next((name for name in self.model.items if needle in name.lower()), None)
+                if match:
+                    self.set_current_deck(match)
+
+    def set_current_deck(self, name):
+        item = self.model.items.get(name)
+        if item is None:
+            return
+        index = self.proxy.mapFromSource(item.index())
+        if index.isValid():
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
+
+    def current_deck(self):
+        """Full name of the selected deck, or "" if none is selected."""
+        index = self.tree.currentIndex()
+        if not index.isValid():
+            return ""
+        return index.siblingAtColumn(0).data(FULL_NAME_ROLE) or ""
+
+    def _choose_current(self):
+        name = self.current_deck()
+        if name:
+            self.deck_chosen.emit(name)
@@ -0,0 +1,107 @@
+"""Diagnostics window for the Float Cards addon."""
+
+import json
+import os
+import time
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog)
+from PyQt6.QtCore import QTimer
+from aqt.utils import tooltip
+
+from .logger import setup_logger, get_log_dir
+
+# Get logger
+logger = setup_logger()
+
+LATENCY_COLUMNS = [
+    ("Action", None),
+    ("Count", "count"),
+    ("p50 (ms)", "recent_p50_ms"),
+    ("p90 (ms)", "recent_p90_ms"),
+    ("p99 (ms)", "recent_p99_ms"),
+    ("Mean (ms)", "mean_ms"),
+    ("Max (ms)", "max_ms"),
+]
+
+class DiagnosticsDialog(QDialog):
+    """Show live performance measurements of the popup."""
+
+    def __init__(self, popup):
+        super().__init__(popup)
+        self.popup = popup
+        self.setWindowTitle("Float Cards Diagnostics")
+        self.setMinimumWidth(560)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Key press to paint latency (percentiles over the last 200 presses):"))
+
+        self.latency_table = QTableWidget(0, len(LATENCY_COLUMNS))
+        self.latency_table.setHorizontalHeaderLabels([label for label, _ in LATENCY_COLUMNS])
+        self.latency_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.latency_table.verticalHeader().setVisible(False)
+        layout.addWidget(self.latency_table)
+
+        self.memory_label = QLabel()
+        self.memory_label.setWordWrap(True)
+        layout.addWidget(self.memory_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        export_button = QPushButton("Export JSON...")
+        export_button.clicked.connect(self.export_json)
+        button_layout.addWidget(export_button)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        # Keep the summary rolling while the dialog is open
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        """Reload the measurements into the tables."""
+        try:
+            summary = self.popup.latency.summary()
+            self.latency_table.setRowCount(len(summary))
+            for row, (action, stats) in enumerate(summary.items()):
+                for column, (_, key) in enumerate(LATENCY_COLUMNS):
+                    value = action.replace('_', ' ').title() if key is None else str(stats[key])
+                    self.latency_table.setItem(row, column, QTableWidgetItem(value))
+
+            memory = self.popup.memory_tracker.last_summary
+            if memory:
+                self.memory_label.setText(f"Memory: {self.popup.memory_tracker.summary_line(memory)}")
+            else:
+                self.memory_label.setText("Memory: tracking disabled (enable it or use Memory Diff Now)")
+        except Exception as e:
+            logger.error(f"Error refreshing diagnostics: {str(e)}", exc_info=True)
+
+    def report(self):
+        """Collect everything shown in the dialog as a JSON-serialisable dict."""
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "latency": self.popup.latency.summary(),
+            "memory": self.popup.memory_tracker.last_summary,
+        }
+
+    def export_json(self):
+        """Save the current measurements to a JSON file."""
+        try:
+            default_path = os.path.join(get_log_dir(), f"diagnostics-{time.strftime('%Y%m%d-%H%M%S')}.json")
+            path, _ = QFileDialog.getSaveFileName(self, "Export Diagnostics", default_path, "JSON (*.json)")
+            if not path:
+                return
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, indent=4)
+            tooltip(f"Diagnostics exported to {path}")
+        except Exception as e:
+            logger.error(f"Error exporting diagnostics: {str(e)}", exc_info=True)
+            tooltip("Error exporting diagnostics")
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
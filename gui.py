@@ -5,20 +5,40 @@ from PyQt6.QtGui import QAction
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEngineSettings
 from aqt.webview import AnkiWebView
-from aqt import mw
+from aqt import mw, dialogs
 from aqt.sound import play_clicked_audio
 from aqt.utils import tooltip
 from anki.hooks import wrap
 import os
 import re
+import time
 from PyQt6.QtWebChannel import QWebChannel
 
 from .config import Config
 from .logger import setup_logger
+from .profiler import ProfileSession
+from .card_stats import CardCostTracker
+from .tracer import TraceRecorder, PAGE_TID
+from .latency import LatencyTracker
+from .diagnostics import DiagnosticsDialog
+from .analytics import AnalyticsDialog
+from .replay import SessionRecorder
+from .memory_tracker import MemoryTracker
+from .telemetry import ReviewTelemetry, ORIGIN_SCHEDULED, ORIGIN_MANUAL
+from .card_queue import CardQueue
+from .card_source import get_source
+from .ticker import Ticker
+from .invalidation import bus, NOTE, NOTETYPE
+from .watchdog import operation, operation_active, tracked
+from . import autotune
+from .metrics import CARDS_SHOWN, GRADES, RENDER_SECONDS
 
 # Get logger
 logger = setup_logger()
 
+# Buttons disabled for an answer the reviewer never followed with a new question are enabled again after this
+ANSWER_TIMEOUT_MS = 5000
+
 class FloatCardPopup(QDialog):
     def __init__(self, parent=None):
         super().__init__(None)  # Set parent to None for independent window
@@ -33,6 +53,50 @@ class FloatCardPopup(QDialog):
         
         # Re-add stay on top if configured (after setting other flags)
         self.config = Config.get_config()
+        self.profile_session = ProfileSession()
+        self.tracer = TraceRecorder()
+        self.latency = LatencyTracker()
+        # The popup's own card, which is not the reviewer's in headless mode
+        self.recorder = SessionRecorder(card_func=self.current_card)
+        self.memory_tracker = MemoryTracker(self)
+        self.diagnostics_dialog = None
+        self.analytics_dialog = None
+        self.telemetry = ReviewTelemetry()
+        # When the popup was opened and by whom, and when the current question was shown
+        self.popup_shown_at = None
+        self.popup_origin = ORIGIN_MANUAL
+        self.question_shown_at = None
+        self.popup_answers = 0
+        self.popup_response_s = None
+        # Hidden by minimizing rather than closing
+        self.minimized = False
+        # Settings of the schedule that opened the popup, overriding `scheduling`
+        self.schedule_settings = None
+        # Question HTML rendered ahead for the rest of a burst (the page is still loaded per card):
+        # (card id, night mode) -> (note id, html)
+        self.prerendered = {}
+        bus.register("prerendered", self._evict_prerendered, (NOTE, NOTETYPE))
+        # Upcoming cards of the deck under review, fetched in batches
+        self.card_queue = CardQueue()
+        # Search the scheduled headless popup samples its cards from, instead of the card queue
+        self.card_source = None
+        # Passive mode cycling cards without answering them
+        self.ticker = Ticker(self)
+        # An answer is being saved; the buttons stay disabled until the next card is up
+        self.answering = False
+        self.answering_timer = QTimer(self)
+        self.answering_timer.setSingleShot(True)
+        self.answering_timer.timeout.connect(self._on_answer_timeout)
+        # Headless review mode: the popup's own card and its scheduling states
+        self.headless_card = None
+        self.headless_states = None
+        self.card_costs = CardCostTracker(limit=self.config.get('diagnostics', {}).get('slow_card_limit', 20))
+        
+        # Persist card costs a few seconds after they change rather than on every card
+        self.card_costs_timer = QTimer()
+        self.card_costs_timer.setSingleShot(True)
+        self.card_costs_timer.setInterval(5000)
+        self.card_costs_timer.timeout.connect(self.card_costs.save)
         self.setup_ui()
         self.apply_theme()
         if self.config['stay_on_top']:
@@ -117,6 +181,7 @@ class FloatCardPopup(QDialog):
         
         # Set up page
         self.web_view.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.web_view.loadFinished.connect(self._on_load_finished)
         
         # Add context menu for inspect element
         self.web_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
@@ -267,7 +332,7 @@ class FloatCardPopup(QDialog):
         border_color = show_answer_colors.get('border', '#F0F0F0')
 
         self.show_answer_button = QPushButton("Show Answer")
-        self.show_answer_button.clicked.connect(self.show_answer)
+        self.show_answer_button.clicked.connect(lambda: self.show_answer())
         self.show_answer_button.setFixedHeight(height)
         self.show_answer_button.setStyleSheet(f"""
             QPushButton {{
@@ -297,11 +362,54 @@ class FloatCardPopup(QDialog):
         reload_action.triggered.connect(self.web_view.reload)
         menu.addAction(reload_action)
         
+        # Add profiling action
+        profile_action = QAction("Stop Profiling" if self.profile_session.active else "Start Profiling", self)
+        profile_action.triggered.connect(self.toggle_profiling)
+        menu.addAction(profile_action)
+        
+        # Add tracing action
+        trace_action = QAction("Stop Tracing" if self.tracer.active else "Start Tracing", self)
+        trace_action.triggered.connect(self.toggle_tracing)
+        menu.addAction(trace_action)
+        
+        # Add session recording action
+        record_action = QAction("Stop Recording Session" if self.recorder.active else "Record Session", self)
+        record_action.triggered.connect(self.toggle_recording)
+        menu.addAction(record_action)
+        
+        # Add memory diff action
+        memory_action = QAction("Memory Diff Now", self)
+        memory_action.triggered.connect(self.memory_diff_now)
+        menu.addAction(memory_action)
+        
+        # Add diagnostics action
+        diagnostics_action = QAction("Diagnostics...", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        menu.addAction(diagnostics_action)
+        
+        # Add review statistics action
+        analytics_action = QAction("Review Statistics...", self)
+        analytics_action.triggered.connect(self.show_analytics)
+        menu.addAction(analytics_action)
+        
+        # Add ticker mode action
+        ticker_action = QAction("Stop Ticker" if self.ticker.running else "Start Ticker", self)
+        ticker_action.triggered.connect(self.toggle_ticker)
+        menu.addAction(ticker_action)
+        
+        # Add slow card report action
+        heaviest_action = QAction("Heaviest Cards...", self)
+        heaviest_action.triggered.connect(self.show_heaviest_cards)
+        menu.addAction(heaviest_action)
+        
         if len(menu.actions()) > 0:
             menu.exec(self.web_view.mapToGlobal(pos))
 
-    def _generate_card_html(self, content, night_mode, platform_class, theme):
-        """Generate the HTML template for card content."""
+    @tracked("generate_card_html")
+    def _generate_card_html(self, content, night_mode, platform_class, theme, card=None):
+        """Generate the HTML template for card content, styled with `card`'s CSS (default: current card)."""
+        if card is None:
+            card = self.current_card()
         # Get background settings
         background_config = self.config.get('background', {})
         background_enabled = background_config.get('enabled', False)
@@ -502,13 +610,45 @@ class FloatCardPopup(QDialog):
                 }}
                 
                 /* Card CSS */
-                {mw.reviewer.card.css() if mw.reviewer and mw.reviewer.card else ''}
+                {card.css() if card else ''}
                 </style>
                 <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
                 <script>
                 let miniCard;
+                // Which marks the addon wants, asked once the page is shown; its HTML may have been generated ahead
+                let _floatWanted = null;
+                let _floatMarks = [];
+                
+                function _floatPost(name, ts) {{
+                    if (name === 'page paint' ? _floatWanted.paint : _floatWanted.trace) {{
+                        miniCard.page_mark(name, ts);
+                    }}
+                }}
+                
+                // Post a timestamped mark back to the addon (queued until the channel is up)
+                function _floatMark(name) {{
+                    const ts = performance.timeOrigin + performance.now();
+                    if (_floatWanted) {{
+                        _floatPost(name, ts);
+                    }} else {{
+                        _floatMarks.push([name, ts]);
+                    }}
+                }}
+                
                 new QWebChannel(qt.webChannelTransport, function(channel) {{
                     miniCard = channel.objects.miniCard;
+                    miniCard.marks_wanted(function(wanted) {{
+                        _floatWanted = wanted;
+                        _floatMarks.forEach(function(mark) {{ _floatPost(mark[0], mark[1]); }});
+                        _floatMarks = [];
+                    }});
+                }});
+                
+                window.addEventListener('load', function() {{
+                    _floatMark('page load');
+                    requestAnimationFrame(function() {{
+                        requestAnimationFrame(function() {{ _floatMark('page paint'); }});
+                    }});
                 }});
                 
                 function _runHook(hook) {{ return; }}
@@ -517,6 +657,8 @@ class FloatCardPopup(QDialog):
                 }}
                 
                 document.addEventListener('DOMContentLoaded', function() {{
+                    _floatMark('DOMContentLoaded');
+                    
                     // Make card content selectable
                     var qaDiv = document.querySelector('#qa');
                     if (qaDiv) {{
@@ -529,69 +671,79 @@ class FloatCardPopup(QDialog):
             </html>
         """
 
+    @tracked("update_card")
     def update_card(self):
         """Update the mini-card window with HTML content."""
         try:
-            card = mw.reviewer.card
+            # Get the latest config
+            self.config = Config.get_config()
+            if self.ticker.running:
+                return  # The ticker decides what is shown
+            
+            card = self.current_card()
+            if not card and self.headless:
+                card = self.headless_card = self._next_headless_card()
+                if not card:
+                    self.show_message("No cards match the search" if self.card_source else "No cards due in this deck")
+                    return
             if not card:
                 logger.debug("No card available to update")
                 return
 
             night_mode = mw.pm.night_mode()
-            reviewer = mw.reviewer
-            if not reviewer:
-                logger.debug("No reviewer available")
-                return
-            
-            # Get the latest config
-            self.config = Config.get_config()
-            
-            # Get card content directly from reviewer
-            content = reviewer.card.q()
-            
-            # Get platform class
-            platform_class = "win"  # Default to windows since we're on windows
-            
-            # Get theme colors
-            theme = self.config["theme"]["dark" if night_mode else "light"]
-            
-            html = self._generate_card_html(content, night_mode, platform_class, theme)
+            prerendered = self.prerendered.pop((card.id, night_mode), None)
+            html = prerendered[1] if prerendered else self._render_question(card, night_mode)
             
             # Set up media path and base URL
             media_path = self.get_media_path()
-            if media_path:
-                media_path = media_path.replace('\\', '/')
-                base_url = QUrl.fromLocalFile(media_path + '/')
-                self.web_view.setHtml(html, base_url)
-            else:
-                self.web_view.setHtml(html)
+            self.card_costs.begin(card, html)
+            with operation("setHtml"):
+                if media_path:
+                    media_path = media_path.replace('\\', '/')
+                    base_url = QUrl.fromLocalFile(media_path + '/')
+                    self.web_view.setHtml(html, base_url)
+                else:
+                    self.web_view.setHtml(html)
 
             self.show_answer_button.show()
             self.answer_buttons_widget.hide()
             self.answer_shown = False
+            self._set_answering(False)
+
+            self.question_shown_at = time.monotonic()
+            CARDS_SHOWN.inc()
+            if self.profile_session.active:
+                self.profile_session.card_shown()
+            if self.recorder.active:
+                self.recorder.card_shown(card)
         except Exception as e:
             logger.error(f"Error updating card: {str(e)}", exc_info=True)
             tooltip(f"Error updating card. Check the log file for details.")
 
-    def show_answer(self):
-        """Show the answer and display grading buttons."""
+    @tracked("show_answer")
+    def show_answer(self, latency_action=None):
+        """Show the answer and display grading buttons.
+
+        Args:
+            latency_action: Hotkey action to time until the answer is painted
+        """
         try:
-            card = mw.reviewer.card
+            card = self.current_card()
             if not card:
                 logger.debug("No card available to show answer")
                 return
+            if self.answering or self.ticker.running:
+                return  # Still saving the previous answer, or nothing to answer
+            if latency_action:
+                self.latency.start(latency_action)
 
             night_mode = mw.pm.night_mode()
-            reviewer = mw.reviewer
-            if not reviewer:
-                logger.debug("No reviewer available")
-                return
             
             # Get the latest config
             self.config = Config.get_config()
             
-            # Get card content directly from reviewer
-            content = reviewer.card.a()
+            # Get card content directly from the card
+            content = card.a()
             
             # Get platform class
             platform_class = "win"  # Default to windows since we're on windows
@@ -603,42 +755,400 @@ class FloatCardPopup(QDialog):
             
             # Set up media path and base URL
             media_path = self.get_media_path()
-            if media_path:
-                media_path = media_path.replace('\\', '/')
-                base_url = QUrl.fromLocalFile(media_path + '/')
-                self.web_view.setHtml(html, base_url)
-            else:
-                self.web_view.setHtml(html)
+            self.card_costs.begin(card, html)
+            with operation("setHtml"):
+                if media_path:
+                    media_path = media_path.replace('\\', '/')
+                    base_url = QUrl.fromLocalFile(media_path + '/')
+                    self.web_view.setHtml(html, base_url)
+                else:
+                    self.web_view.setHtml(html)
 
             self.answer_shown = True
             self.show_answer_button.hide()
             self.answer_buttons_widget.show()
 
             # Also show answer in main window to sync state
-            if hasattr(mw.reviewer, '_showAnswer'):
+            if not self.headless and hasattr(mw.reviewer, '_showAnswer'):
                 mw.reviewer._showAnswer()
         except Exception as e:
             logger.error(f"Error showing answer: {str(e)}", exc_info=True)
             tooltip(f"Error showing answer. Check the log file for details.")
 
-    def grade_card(self, ease):
-        """Grade the card with the specified ease value."""
+    @tracked("grade_card")
+    def grade_card(self, ease, latency_action=None):
+        """Grade the card with the specified ease value.
+
+        Args:
+            latency_action: Hotkey action to time until the next card is painted
+        """
         try:
-            if mw.reviewer and mw.reviewer.card and self.answer_shown:
-                # Make sure answer is shown in main window
-                if not mw.reviewer.state == 'answer':
-                    mw.reviewer._showAnswer()
-                # Use the reviewer's _answerCard method
-                mw.reviewer._answerCard(ease)
-                # Check if auto-close is enabled
-                if self.config.get('scheduling', {}).get('auto_close_on_answer', False):
-                    self.hide()
-                # Don't update here - let the showQuestion hook handle it
+            card = self.current_card()
+            if card and self.answer_shown and not self.answering:
+                if not self.headless and not self._reviewer_takes_answer():
+                    tooltip("Open the deck in Anki's reviewer to answer from the popup")
+                    return
+                if latency_action:
+                    self.latency.start(latency_action)
+                # Capture before answering; the next card may be shown synchronously
+                card_id = card.id
+                time_to_answer_ms = self._time_to_answer_ms()
+                # Disable the buttons straight away; the next card enables them again
+                self._set_answering(True)
                 self.answer_shown = False
+                if self.headless:
+                    self._answer_headless(
+                        card, ease, lambda: self._after_answer(card_id, ease, time_to_answer_ms)
+                    )
+                else:
+                    # Use the reviewer's _answerCard method, which saves the answer in the background
+                    self.answering_timer.start(ANSWER_TIMEOUT_MS)
+                    self.telemetry.answering_in_reviewer(card_id)
+                    with operation("reviewer._answerCard"):
+                        mw.reviewer._answerCard(ease)
+                    self._after_answer(card_id, ease, time_to_answer_ms)
         except Exception as e:
+            self._set_answering(False)
             logger.error(f"Error grading card: {str(e)}", exc_info=True)
             tooltip(f"Error grading card. Check the log file for details.")
 
+    def _after_answer(self, card_id, ease, time_to_answer_ms):
+        """Record an answer and move on to the next card, or close."""
+        GRADES.inc(str(ease))
+        if self.popup_answers == 0 and self.popup_shown_at is not None:
+            self.popup_response_s = time.time() - self.popup_shown_at
+        self.popup_answers += 1
+        self.telemetry.record(card_id, ease, time_to_answer_ms, self.popup_shown_at, self.popup_origin)
+        # Close after the answer if auto-close is on or the burst is over
+        if self._should_close_after_answer():
+            self.latency.cancel()
+            self.hide()
+            self._set_answering(False)
+        elif self.headless:
+            # No reviewer to fire showQuestion; show our own next card
+            self.update_card()
+        # Otherwise the showQuestion hook shows the reviewer's next card
+
+    def _reviewer_takes_answer(self):
+        """Whether the main reviewer will accept an answer, showing its answer side if needed.
+
+        Its _answerCard returns silently unless the main window is reviewing
+        and the answer is shown, e.g. when the popup was opened from the deck
+        browser.
+        """
+        if mw.state != 'review' or not mw.reviewer or not mw.reviewer.card:
+            return False
+        if mw.reviewer.state != 'answer':
+            mw.reviewer._showAnswer()
+        return mw.reviewer.state == 'answer'
+
+    def _on_answer_timeout(self):
+        """The reviewer took an answer but never showed the next question."""
+        if not self.answering or self.headless:
+            return
+        logger.warning("No new question after answering in the reviewer; enabling the buttons again")
+        self.telemetry.popup_answered_ids.clear()
+        self._set_answering(False)
+        self.answer_shown = mw.reviewer.state == 'answer'
+
+    def _set_answering(self, answering):
+        self.answering = answering
+        if not answering:
+            self.answering_timer.stop()
+        self.show_answer_button.setEnabled(not answering)
+        self.answer_buttons_widget.setEnabled(not answering)
+
+    def _render_question(self, card, night_mode):
+        """Render the popup page for the question side of `card`."""
+        # Get card content directly from the card
+        content = card.q()
+        
+        # Get platform class
+        platform_class = "win"  # Default to windows since we're on windows
+        
+        # Get theme colors
+        theme = self.config["theme"]["dark" if night_mode else "light"]
+        
+        return self._generate_card_html(content, night_mode, platform_class, theme, card)
+
+    @property
+    def headless(self):
+        """Whether the popup reviews by itself instead of mirroring the main reviewer."""
+        return self.config.get('review_mode', "reviewer") == "headless"
+
+    def current_card(self):
+        """The card the popup is showing: its own in headless mode, else the main reviewer's."""
+        if self.headless:
+            return self.headless_card
+        return mw.reviewer.card if mw.reviewer else None
+
+    def start_headless(self, deck_id):
+        """Review `deck_id` in headless mode, starting with the top of its queue."""
+        self.card_queue.release()
+        self.card_queue.set_deck(deck_id)
+        self.headless_card = None
+        self.headless_states = None
+
+    @tracked("headless.next_card")
+    def _next_headless_card(self):
+        """Take the next card of the review deck from the card queue, or sample the search."""
+        if self.card_source is not None:
+            card_id = self.card_source.sample()
+            if card_id is None:
+                return None
+            card = mw.col.get_card(card_id)
+            card.start_timer()
+            self.headless_states = mw.col.sched.get_scheduling_states(card_id)
+            return card
+        queued = self.card_queue.pop()
+        if not queued:
+            return None
+        card, self.headless_states = queued
+        card.start_timer()
+        return card
+
+    def _answer_headless(self, card, ease, on_done):
+        """Answer `card` through the collection scheduler, bypassing the reviewer.
+
+        The answer is saved by an undoable collection op on Anki's background
+        thread; `on_done` runs on the main thread once it is stored.
+        """
+        from aqt.operations import CollectionOp
+        from anki.scheduler.v3 import CardAnswer
+
+        ratings = {1: CardAnswer.AGAIN, 2: CardAnswer.HARD, 3: CardAnswer.GOOD, 4: CardAnswer.EASY}
+        answer = mw.col.sched.build_answer(card=card, states=self.headless_states, rating=ratings[ease])
+
+        def answered(changes):
+            if self.card_source is None:
+                self.card_queue.answered(card, ease)
+            self.headless_card = None
+            self.headless_states = None
+            on_done()
+
+        def failed(error):
+            self._set_answering(False)
+            self.answer_shown = True
+            logger.error(f"Error saving answer for card {card.id}: {error}", exc_info=error)
+            tooltip("Error grading card. Check the log file for details.")
+
+        CollectionOp(
+            parent=self, op=lambda col: col.sched.answer_card(answer)
+        ).success(answered).failure(failed).run_in_background(initiator=self.card_queue)
+
+    def _schedule_setting(self, key, default):
+        """A scheduling setting, from the schedule that opened the popup if it sets it."""
+        if self.schedule_settings and key in self.schedule_settings:
+            return self.schedule_settings[key]
+        return self.config.get('scheduling', {}).get(key, default)
+
+    def _in_burst(self):
+        """Whether this popup serves a burst of several cards or seconds."""
+        if self.popup_origin != ORIGIN_SCHEDULED:
+            return False
+        return self._schedule_setting('burst_cards', 1) > 1 or self._schedule_setting('burst_seconds', 0) > 0
+
+    def _should_close_after_answer(self):
+        if not self._in_burst():
+            return self._schedule_setting('auto_close_on_answer', False)
+        seconds = self._schedule_setting('burst_seconds', 0)
+        if seconds and self.popup_shown_at is not None and time.time() - self.popup_shown_at >= seconds:
+            return True
+        cards = self._schedule_setting('burst_cards', 1)
+        return cards > 1 and self.popup_answers >= cards
+
+    def _prefetch_burst(self):
+        """Queue the next cards of a burst now and render their question HTML once the first card is up.
+
+        Only the HTML is prepared; update_card still loads it into the page
+        when each card is shown. Called while the scheduler has the scheduled deck selected, so the
+        queue is that deck's.
+        """
+        self.prerendered.clear()
+        cards = self._schedule_setting('burst_cards', 1)
+        if cards <= 1 or self.card_source is not None:
+            return  # Searches are sampled one card at a time
+        try:
+            self.card_queue.set_deck(mw.col.decks.get_current_id())
+            # The first card is the one about to be shown
+            backend_cards = self.card_queue.peek(cards)[1:]
+        except Exception as e:
+            logger.debug(f"Could not prefetch burst cards: {e}")
+            return
+        QTimer.singleShot(0, lambda: self._prerender(backend_cards))
+
+    @tracked("prerender_burst")
+    def _prerender(self, backend_cards):
+        from anki.cards import Card
+
+        night_mode = mw.pm.night_mode()
+        for backend_card in backend_cards:
+            if not self.isVisible():
+                return
+            try:
+                card = Card(mw.col, backend_card=backend_card)
+                self.prerendered[(card.id, night_mode)] = (card.nid, self._render_question(card, night_mode))
+            except Exception as e:
+                logger.debug(f"Could not pre-render card {backend_card.id}: {e}")
+
+    def _evict_prerendered(self, scope, keys):
+        """Drop pre-rendered HTML of edited notes, or all of them."""
+        if keys is None:
+            self.prerendered.clear()
+        else:
+            self.prerendered = {key: value for key, value in self.prerendered.items() if value[0] not in keys}
+
+    def _time_to_answer_ms(self):
+        if self.question_shown_at is None:
+            return None
+        return int((time.monotonic() - self.question_shown_at) * 1000)
+
+    def showEvent(self, event):
+        """Remember when and why the popup was opened, for the review history."""
+        if self.minimized:
+            # Restored from the taskbar: the same popup goes on
+            self.minimized = False
+            super().showEvent(event)
+            return
+        self.popup_shown_at = time.time()
+        self.popup_origin = ORIGIN_SCHEDULED if operation_active("scheduler.show_card") else ORIGIN_MANUAL
+        self.popup_answers = 0
+        self.popup_response_s = None
+        self.card_source = None
+        if self.popup_origin == ORIGIN_MANUAL:
+            self.schedule_settings = None
+        else:
+            # A schedule without its own search uses its deck, not `scheduling.search`
+            if self.schedule_settings is not None:
+                search = self.schedule_settings.get('search', "").strip()
+            else:
+                search = self.config.get('scheduling', {}).get('search', "").strip()
+            if search and self.headless:
+                self.card_source = get_source(search)
+            if self.headless:
+                # The scheduler has its deck selected while it shows the popup
+                self.start_headless(mw.col.decks.get_current_id())
+            if self._in_burst():
+                self._prefetch_burst()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        """Report how a scheduled popup went, for frequency auto-tuning."""
+        if self.isMinimized():
+            # Not dismissed; reported when it is closed after being restored
+            self.minimized = True
+            super().hideEvent(event)
+            return
+        if self.popup_origin == ORIGIN_SCHEDULED and self.popup_shown_at is not None:
+            autotune.outcomes.record(self.popup_shown_at, self.popup_response_s, self.popup_answers)
+            self.popup_shown_at = None
+        self.prerendered.clear()
+        self.ticker.stop()
+        super().hideEvent(event)
+
+    def _on_load_finished(self, ok):
+        """Record the render cost of the card that just finished loading."""
+        if self.tracer.active:
+            self.tracer.instant("loadFinished", args={"ok": ok})
+        entry = self.card_costs.finish()
+        if entry is not None:
+            RENDER_SECONDS.observe(entry["render_ms"] / 1000)
+            self.card_costs_timer.start()
+
+    @pyqtSlot(result='QVariantMap')
+    def marks_wanted(self):
+        """Tell the page on screen which marks to post: the paint only while a hotkey is being timed."""
+        return {"trace": self.tracer.active, "paint": self.latency.pending is not None}
+
+    @pyqtSlot(str, float)
+    def page_mark(self, name, timestamp_ms):
+        """Receive a timestamped mark posted by the card page."""
+        if name == 'page paint':
+            self.latency.painted()
+        if self.tracer.active:
+            self.tracer.instant(name, cat="page", ts=int(timestamp_ms * 1000), tid=PAGE_TID)
+
+    def toggle_tracing(self):
+        """Start or stop recording a trace of the review session."""
+        try:
+            if self.tracer.active:
+                path = self.tracer.stop()
+                tooltip(f"Trace saved to {path}")
+            else:
+                diagnostics = self.config.get('diagnostics', {})
+                self.tracer.max_bytes = diagnostics.get('trace_max_mb', 20) * 1024 * 1024
+                self.tracer.max_files = diagnostics.get('trace_files', 5)
+                self.tracer.start()
+                tooltip("Tracing started")
+        except Exception as e:
+            logger.error(f"Error toggling tracing: {str(e)}", exc_info=True)
+            tooltip("Error toggling tracing")
+
+    def toggle_recording(self):
+        """Start or stop recording the review session for later replay."""
+        try:
+            if self.recorder.active:
+                path = self.recorder.stop()
+                if path:
+                    tooltip(f"Session saved to {path}")
+            else:
+                self.recorder.start()
+                tooltip("Recording review session")
+        except Exception as e:
+            logger.error(f"Error toggling session recording: {str(e)}", exc_info=True)
+            tooltip("Error toggling session recording")
+
+    def memory_diff_now(self):
+        """Log the allocation growth since the last memory snapshot."""
+        try:
+            if not self.memory_tracker.running:
+                interval = self.config.get('diagnostics', {}).get('memory_interval_minutes', 10)
+                self.memory_tracker.start(interval)
+                tooltip("Memory tracking started, baseline snapshot taken")
+                return
+            if self.memory_tracker.diff_now():
+                tooltip("Memory diff written to logs/memory.log")
+        except Exception as e:
+            logger.error(f"Error taking memory diff: {str(e)}", exc_info=True)
+            tooltip("Error taking memory diff")
+
+    def show_diagnostics(self):
+        """Open the diagnostics window."""
+        try:
+            if self.diagnostics_dialog is None:
+                self.diagnostics_dialog = DiagnosticsDialog(self)
+            self.diagnostics_dialog.refresh()
+            self.diagnostics_dialog.show()
+            self.diagnostics_dialog.raise_()
+        except Exception as e:
+            logger.error(f"Error showing diagnostics: {str(e)}", exc_info=True)
+            tooltip("Error showing diagnostics")
+
+    def show_analytics(self):
+        """Open the review statistics window."""
+        try:
+            if self.analytics_dialog is None:
+                self.analytics_dialog = AnalyticsDialog(self)
+            self.analytics_dialog.refresh()
+            self.analytics_dialog.show()
+            self.analytics_dialog.raise_()
+        except Exception as e:
+            logger.error(f"Error showing review statistics: {str(e)}", exc_info=True)
+            tooltip("Error showing review statistics")
+
+    def show_heaviest_cards(self):
+        """Open the browser on the cards that were slowest to render."""
+        try:
+            self.card_costs.save()
+            query = self.card_costs.search_query()
+            if not query:
+                tooltip("No card render measurements yet")
+                return
+            dialogs.open("Browser", mw, search=(query,))
+        except Exception as e:
+            logger.error(f"Error showing heaviest cards: {str(e)}", exc_info=True)
+            tooltip("Error showing heaviest cards")
+
     def get_media_path(self):
         """Get the media folder path safely."""
         try:
@@ -664,7 +1174,7 @@ class FloatCardPopup(QDialog):
             self.setStyleSheet(style)
             
             # Update card content to refresh the background
-            if mw.reviewer and mw.reviewer.card:
+            if self.current_card():
                 if self.answer_shown:
                     self.show_answer()
                 else:
@@ -675,6 +1185,7 @@ class FloatCardPopup(QDialog):
             logger.error(f"Error applying theme: {str(e)}", exc_info=True)
             tooltip(f"Error applying theme. Check the log file for details.")
 
+    @tracked("resizeEvent")
     def resizeEvent(self, event):
         """Save window size when resized."""
         try:
@@ -701,6 +1212,8 @@ class FloatCardPopup(QDialog):
                 logger.debug(f"Window state saved: pos=({self.x()}, {self.y()}), size={self.width()}x{self.height()}")
         except Exception as e:
             logger.error(f"Error saving window state: {str(e)}", exc_info=True)
+        self.card_costs.save()
+        self.telemetry.flush()
         super().closeEvent(event)
 
     def toggle_scheduling(self):
@@ -717,10 +1230,11 @@ class FloatCardPopup(QDialog):
             Config.save_config(self.config)
             
             # Update scheduler state
-            from . import float_card_popup
+            from . import float_card_popup, schedule_engine
             if hasattr(float_card_popup, 'scheduler'):
                 logger.debug("Updating scheduler state")
                 float_card_popup.scheduler.update_state(self.config)
+            schedule_engine.update_state(self.config)
             
             # Show feedback
             if self.config['scheduling']['enabled']:
@@ -743,6 +1257,8 @@ class FloatCardPopup(QDialog):
             
             # Toggle auto-close
             self.config['scheduling']['auto_close_on_answer'] = not self.config['scheduling'].get('auto_close_on_answer', False)
+            if self.schedule_settings:
+                self.schedule_settings.pop('auto_close_on_answer', None)
             
             # Save to file
             Config.save_config(self.config)
@@ -757,9 +1273,68 @@ class FloatCardPopup(QDialog):
             logger.error(f"Error toggling auto-close: {str(e)}", exc_info=True)
             tooltip("Error toggling auto-close")
 
+    def toggle_ticker(self):
+        """Start or stop cycling cards without answering them."""
+        try:
+            if self.ticker.running:
+                self.ticker.stop()
+                tooltip("Ticker stopped")
+                self.update_card()
+            else:
+                self.ticker.start()
+                tooltip(f"Ticker showing cards from '{self.ticker.query()}'")
+        except Exception as e:
+            logger.error(f"Error toggling ticker: {str(e)}", exc_info=True)
+            tooltip("Error toggling ticker")
+
+    def show_ticker_page(self, html):
+        """Show a page the ticker rendered, without answer buttons."""
+        try:
+            media_path = self.get_media_path()
+            self.card_costs.cancel()
+            with operation("setHtml"):
+                if media_path:
+                    media_path = media_path.replace('\\', '/')
+                    base_url = QUrl.fromLocalFile(media_path + '/')
+                    self.web_view.setHtml(html, base_url)
+                else:
+                    self.web_view.setHtml(html)
+            self.show_answer_button.hide()
+            self.answer_buttons_widget.hide()
+            self.answer_shown = False
+        except Exception as e:
+            logger.error(f"Error showing ticker page: {str(e)}", exc_info=True)
+
+    def toggle_profiling(self):
+        """Start or stop a CPU profiling session."""
+        try:
+            if self.profile_session.active:
+                summary_path = self.profile_session.stop()
+                if summary_path:
+                    tooltip(f"Profile saved to {summary_path}")
+                return
+
+            diagnostics = self.config.get('diagnostics', {})
+            cards = diagnostics.get('profile_cards', 20)
+            seconds = diagnostics.get('profile_seconds', 0)
+            self.profile_session.start(cards=cards, seconds=seconds)
+            if cards and seconds:
+                tooltip(f"Profiling the next {cards} cards or {seconds} seconds")
+            elif seconds:
+                tooltip(f"Profiling the next {seconds} seconds")
+            else:
+                tooltip(f"Profiling the next {cards} cards")
+        except Exception as e:
+            logger.error(f"Error toggling profiling: {str(e)}", exc_info=True)
+            tooltip("Error toggling profiling")
+
+    @tracked("keyPressEvent")
     def keyPressEvent(self, event):
         """Handle keyboard shortcuts."""
         try:
+            if self.recorder.active:
+                self.recorder.key_pressed(event)
+            
             # Get hotkey config
             hotkeys = self.config.get('hotkeys', {})
             logger.debug(f"Current hotkeys config: {hotkeys}")
@@ -802,6 +1377,13 @@ class FloatCardPopup(QDialog):
                 event.accept()
                 return
             
+            # Handle Ctrl+Alt+P for profiling
+            if ctrl_pressed and alt_pressed and key == Qt.Key.Key_P:
+                logger.debug("Handling Ctrl+Alt+P for profiling")
+                self.toggle_profiling()
+                event.accept()
+                return
+            
             # Handle special keys
             if key == Qt.Key.Key_Space:
                 key_text = 'space'
@@ -827,7 +1409,7 @@ class FloatCardPopup(QDialog):
                 # Show answer
                 if not self.answer_shown and key_text == hotkeys.get('show_answer', ''):
                     logger.debug("Handling show answer hotkey")
-                    self.show_answer()
+                    self.show_answer(latency_action="show_answer")
                     event.accept()
                     return
                 
@@ -835,22 +1417,22 @@ class FloatCardPopup(QDialog):
                 if self.answer_shown:
                     if key_text == hotkeys.get('again', ''):
                         logger.debug("Handling again hotkey")
-                        self.grade_card(1)
+                        self.grade_card(1, latency_action="again")
                         event.accept()
                         return
                     elif key_text == hotkeys.get('hard', ''):
                         logger.debug("Handling hard hotkey")
-                        self.grade_card(2)
+                        self.grade_card(2, latency_action="hard")
                         event.accept()
                         return
                     elif key_text == hotkeys.get('good', ''):
                         logger.debug("Handling good hotkey")
-                        self.grade_card(3)
+                        self.grade_card(3, latency_action="good")
                         event.accept()
                         return
                     elif key_text == hotkeys.get('easy', ''):
                         logger.debug("Handling easy hotkey")
-                        self.grade_card(4)
+                        self.grade_card(4, latency_action="easy")
                         event.accept()
                         return
             
@@ -902,13 +1484,14 @@ class FloatCardPopup(QDialog):
     def replay_sound(self, index=0):
         """Replay the current card's audio."""
         try:
-            if mw.reviewer and mw.reviewer.card:
+            card = self.current_card()
+            if card:
                 if self.answer_shown:
                     # Use Anki's native audio playback
-                    play_clicked_audio(f"play:a:{index}", mw.reviewer.card)
+                    play_clicked_audio(f"play:a:{index}", card)
                 else:
                     # Play question audio
-                    play_clicked_audio(f"play:q:{index}", mw.reviewer.card)
+                    play_clicked_audio(f"play:q:{index}", card)
         except Exception as e:
             logger.error(f"Error replaying sound: {str(e)}", exc_info=True)
 
@@ -935,6 +1518,7 @@ class FloatCardPopup(QDialog):
         self.raise_()  # Ensure window is on top
         logger.debug("Focus set to mini card popup")
 
+    @tracked("show_popup")
     def show_popup(self):
         """Show the popup window with the current card."""
         try:
@@ -954,7 +1538,7 @@ class FloatCardPopup(QDialog):
                 logger.info("Mini card popup window shown")
                 
                 # Update with current card if available
-                if mw.reviewer and mw.reviewer.card:
+                if self.headless or self.current_card():
                     logger.info("Updating card in popup window")
                     self.update_card()
                 else:
@@ -963,6 +1547,10 @@ class FloatCardPopup(QDialog):
             logger.error(f"Error showing popup: {str(e)}", exc_info=True)
             tooltip(f"Error showing popup: {str(e)}")
 
+    def set_schedule_status(self, status):
+        """Show the scheduler's state, e.g. while backing off, in the window title."""
+        self.setWindowTitle(f"Float Cards - {status}" if status else "Float Cards")
+
     def show_message(self, message):
         """Show a message in the card area."""
         try:
@@ -997,12 +1585,14 @@ class FloatCardPopup(QDialog):
             """
             
             # Set the HTML content
+            self.card_costs.cancel()
             self.web_view.setHtml(html)
             
             # Hide answer buttons
             self.show_answer_button.hide()
             self.answer_buttons_widget.hide()
             self.answer_shown = False
+            self._set_answering(False)
             
         except Exception as e:
             logger.error(f"Error showing message: {str(e)}", exc_info=True)
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""Collection change notifications for the add-on's caches.
+
+Anki reports collection changes in several places: `operation_did_execute`
+for ops (edits, reviews, undo), `note_will_flush` for legacy note saves, sync
+and collection loads, and nothing at all for the day rollover. The bus turns
+all of them into (scope, keys) evictions, so each cache registers once and
+drops only what a change can affect:
+
+    bus.register("card_queue", queue.evict, (STUDY_QUEUES, DAY))
+
+`keys` is a set of ids (note ids for NOTE) when the change is known to be
+limited to them, or None for everything in the scope. COLLECTION changes
+reach every cache.
+"""
+
+import time
+from PyQt6.QtCore import QTimer
+from aqt import mw, gui_hooks
+from anki import hooks
+
+from .logger import setup_logger
+
+# Get logger
+logger = setup_logger()
+
+# Scopes a cache can subscribe to
+CARD = "card"  # Scheduling or flags of cards
+NOTE = "note"  # Note fields and tags
+NOTETYPE = "notetype"  # Templates and styling
+DECK = "deck"  # Deck names, tree and options
+STUDY_QUEUES = "study_queues"  # What is due
+DAY = "day"  # The scheduler's day rolled over
+COLLECTION = "collection"  # Sync or a newly loaded collection: anything may have changed
+
+# OpChanges flags and the scopes they affect
+OP_SCOPES = (
+    ("card", CARD),
+    ("note", NOTE),
+    ("note_text", NOTE),
+    ("notetype", NOTETYPE),
+    ("deck", DECK),
+    ("deck_config", DECK),
+    ("study_queues", STUDY_QUEUES),
+)
+
+class Subscriber:
+    __slots__ = ("name", "evict", "scopes", "owner")
+
+    def __init__(self, name, evict, scopes, owner):
+        self.name = name
+        self.evict = evict
+        self.scopes = frozenset(scopes)
+        self.owner = owner
+
+class InvalidationBus:
+    """Fan collection changes out to the caches registered for them."""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.started = False
+        self.evictions = 0
+        # Fires at the scheduler's day cutoff
+        self.day_cutoff = None
+        self.day_timer = QTimer()
+        self.day_timer.setSingleShot(True)
+        self.day_timer.timeout.connect(self._on_day_rollover)
+
+    def register(self, name, evict, scopes, owner=None):
+        """Call `evict(scope, keys)` for changes in `scopes`.
+
+        Changes made by ops whose initiator is `owner` are not reported, for
+        caches that account for their own writes.
+        """
+        self.subscribers[name] = Subscriber(name, evict, scopes, owner)
+
+    def unregister(self, name):
+        self.subscribers.pop(name, None)
+
+    def publish(self, scope, keys=None, initiator=None):
+        for subscriber in list(self.subscribers.values()):
+            if scope not in subscriber.scopes and scope != COLLECTION:
+                continue
+            if initiator is not None and subscriber.owner is initiator:
+                continue
+            try:
+                subscriber.evict(scope, keys)
+                self.evictions += 1
+            except Exception as e:
+                logger.error(f"Error invalidating {subscriber.name}: {str(e)}", exc_info=True)
+
+    def start(self):
+        if self.started:
+            return
+        gui_hooks.operation_did_execute.append(self._on_operation)
+        gui_hooks.collection_did_load.append(self._on_collection_load)
+        gui_hooks.sync_did_finish.append(self._on_sync)
+        hooks.note_will_flush.append(self._on_note_flush)
+        self.started = True
+        self._arm_day_timer()
+
+    def stop(self):
+        if not self.started:
+            return
+        gui_hooks.operation_did_execute.remove(self._on_operation)
+        gui_hooks.collection_did_load.remove(self._on_collection_load)
+        gui_hooks.sync_did_finish.remove(self._on_sync)
+        hooks.note_will_flush.remove(self._on_note_flush)
+        self.day_timer.stop()
+        self.started = False
+
+    def _on_operation(self, changes, handler):
+        """gui_hooks.operation_did_execute: edits, reviews and undo."""
+        scopes = {scope for flag, scope in OP_SCOPES if getattr(changes, flag, False)}
+        for scope in scopes:
+            self.publish(scope, self._changed_keys(scope, handler), initiator=handler)
+
+    def _changed_keys(self, scope, handler):
+        """The note an editor save is limited to, else None.
+
+        Other initiators, such as the browser, may have changed many notes.
+        """
+        if scope != NOTE:
+            return None
+        from aqt.editor import Editor
+
+        if isinstance(handler, Editor) and handler.note is not None and handler.note.id:
+            return {handler.note.id}
+        return None
+
+    def _on_note_flush(self, note):
+        self.publish(NOTE, {note.id})
+
+    def _on_sync(self):
+        self.publish(COLLECTION)
+        self._arm_day_timer()
+
+    def _on_collection_load(self, col):
+        self.publish(COLLECTION)
+        self._arm_day_timer()
+
+    def _arm_day_timer(self):
+        try:
+            self.day_cutoff = mw.col.sched.day_cutoff
+        except Exception:
+            return  # No collection yet; armed again when one loads
+        delay_ms = max(0, int((self.day_cutoff - time.time()) * 1000)) + 1000
+        self.day_timer.start(min(delay_ms, 24 * 3600 * 1000))
+
+    def _on_day_rollover(self):
+        if time.time() < self.day_cutoff:
+            # Woken early after clamping a long delay; the cutoff is still ahead
+            self.day_timer.start(max(1000, int((self.day_cutoff - time.time()) * 1000) + 1000))
+            return
+        logger.info("Scheduler day rolled over, invalidating caches")
+        self.publish(DAY)
+        self._arm_day_timer()
+
+# The add-on's single bus; started when the profile loads
+bus = InvalidationBus()
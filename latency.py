@@ -0,0 +1,93 @@
+"""Input-to-paint latency measurement for the popup's hotkeys."""
+
+import time
+from collections import deque
+
+ACTIONS = ("show_answer", "again", "hard", "good", "easy")
+
+# Upper bounds of the histogram buckets in milliseconds; the last bucket is open
+BUCKET_BOUNDS_MS = (10, 20, 35, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2000, 5000)
+
+# Measurements older than this never painted (window hidden, card skipped...)
+STALE_AFTER = 10.0
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class LatencyHistogram:
+    """Fixed-bucket histogram plus a rolling window of recent samples."""
+
+    def __init__(self, window=200):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, value_ms):
+        index = 0
+        while index < len(BUCKET_BOUNDS_MS) and value_ms > BUCKET_BOUNDS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.recent.append(value_ms)
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def summary(self):
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "recent_count": len(recent),
+            "recent_p50_ms": round(percentile(recent, 0.5), 2),
+            "recent_p90_ms": round(percentile(recent, 0.9), 2),
+            "recent_p99_ms": round(percentile(recent, 0.99), 2),
+            "buckets": {
+                (f"le_{bound}" if i < len(BUCKET_BOUNDS_MS) else "inf"): self.buckets[i]
+                for i, bound in enumerate(BUCKET_BOUNDS_MS + (None,))
+            },
+        }
+
+class LatencyTracker:
+    """Time each hotkey action from the key press to the page's next paint.
+
+    The popup calls `start` when it handles a key and the card page reports a
+    requestAnimationFrame callback after the new content was swapped in,
+    which ends the measurement.
+    """
+
+    def __init__(self):
+        self.histograms = {action: LatencyHistogram() for action in ACTIONS}
+        self.pending = None  # (action, started)
+
+    def start(self, action):
+        self.pending = (action, time.perf_counter())
+
+    def cancel(self):
+        self.pending = None
+
+    def painted(self):
+        """End the pending measurement when the page reports a paint.
+
+        Returns:
+            The measured latency in milliseconds, or None
+        """
+        if self.pending is None:
+            return None
+        action, started = self.pending
+        self.pending = None
+        elapsed = time.perf_counter() - started
+        if elapsed > STALE_AFTER:
+            return None
+        elapsed_ms = elapsed * 1000
+        self.histograms[action].add(elapsed_ms)
+        return elapsed_ms
+
+    def summary(self):
+        return {action: histogram.summary() for action, histogram in self.histograms.items()}
@@ -4,6 +4,12 @@ import sys
 from logging.handlers import RotatingFileHandler
 from aqt.utils import showWarning
 
+def get_log_dir():
+    """Get the addon's log directory, creating it if it doesn't exist."""
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    return log_dir
+
 def setup_logger():
     """Set up the logger for the addon."""
     # Get logger
@@ -16,8 +22,7 @@ def setup_logger():
             logger.setLevel(logging.ERROR)
 
             # Create log directory if it doesn't exist
-            log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-            os.makedirs(log_dir, exist_ok=True)
+            log_dir = get_log_dir()
 
             # Create handlers
             log_file = os.path.join(log_dir, 'float_card.log')
@@ -52,4 +57,30 @@ def setup_logger():
         # If logger setup fails completely, at least try to log to stderr
         print(f"Failed to set up logger: {str(e)}", file=sys.stderr)
         
-    return logger 
\ No newline at end of file
+    return logger 
+
+def setup_diagnostics_logger(name, filename):
+    """Set up a logger that writes diagnostics reports to their own file.
+
+    Unlike the main addon logger this one records INFO and above, and does
+    not propagate, so reports don't end up in the error log.
+    """
+    logger = logging.getLogger(f'float_card_popup.{name}')
+    if logger.handlers:
+        return logger
+
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    try:
+        file_handler = RotatingFileHandler(
+            os.path.join(get_log_dir(), filename),
+            maxBytes=1024*1024,  # 1 MB
+            backupCount=3,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logger.addHandler(file_handler)
+    except (IOError, PermissionError) as e:
+        print(f"Could not create {filename}: {str(e)}", file=sys.stderr)
+        logger.addHandler(logging.StreamHandler(sys.stderr))
+    return logger
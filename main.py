@@ -3,20 +3,29 @@ from aqt.qt import QMenu, QAction, QKeySequence, QDialog, QVBoxLayout, QLabel, Q
 from aqt.utils import qconnect
 from .gui import FloatCardPopup
 from .config import Config
+from .deck_picker import DeckPicker
+from .scheduler import enabled_schedules
 from .logger import setup_logger
+from .watchdog import tracked
 
 # Get logger
 logger = setup_logger()
 
 def cleanup():
     """Clean up resources when Anki is closing."""
-    from . import float_card_popup
+    from . import float_card_popup, stall_detector, schedule_engine
+    from .invalidation import bus
     try:
+        stall_detector.stop()
+        bus.stop()
+        schedule_engine.stop()
         if float_card_popup is not None:
+            float_card_popup.telemetry.stop()
             float_card_popup.close()
     except Exception as e:
         logger.error(f"Error during cleanup: {str(e)}", exc_info=True)
 
+@tracked("toggle_float_card")
 def toggle_float_card():
     """Toggles the floating float card window."""
     from . import float_card_popup
@@ -24,6 +33,14 @@ def toggle_float_card():
         if float_card_popup.isVisible():
             logger.info("Hiding float card popup")
             float_card_popup.hide()
+        elif float_card_popup.headless:
+            # The popup reviews the current deck by itself; the main window stays as it is
+            logger.info("Showing float card popup in headless review mode")
+            float_card_popup.start_headless(mw.col.decks.get_current_id())
+            float_card_popup.show()
+            float_card_popup.update_card()
+            float_card_popup.activateWindow()
+            float_card_popup.setFocus()
         else:
             # If we have a card in the current deck, show it
             if mw.reviewer and mw.reviewer.card:
@@ -47,19 +64,10 @@ def toggle_float_card():
                 label = QLabel("Select a deck to review:")
                 layout.addWidget(label)
                 
-                # Add deck selector
-                deck_selector = QComboBox()
-                all_decks = mw.col.decks.all_names_and_ids()
-                deck_selector.addItems([d.name for d in all_decks])
-                
-                # Set the last selected deck if it exists
+                # Add deck selector, starting at the last selected deck if it exists
                 config = Config.get_config()
-                last_deck = config.get('scheduling', {}).get('deck')
-                if last_deck:
-                    index = deck_selector.findText(last_deck)
-                    if index >= 0:
-                        deck_selector.setCurrentIndex(index)
-                
+                last_deck = config.get('scheduling', {}).get('deck') or mw.col.decks.current()['name']
+                deck_selector = DeckPicker(current_deck=last_deck)
                 layout.addWidget(deck_selector)
                 
                 # Add scheduling options
@@ -155,7 +163,7 @@ def toggle_float_card():
                 
                 # Connect buttons
                 def on_accept():
-                    selected_deck = deck_selector.currentText()
+                    selected_deck = deck_selector.current_deck()
                     if selected_deck:
                         # Select the deck and start review
                         deck = mw.col.decks.by_name(selected_deck)
@@ -190,13 +198,18 @@ def toggle_float_card():
                             # Update scheduler if enabled
                             if scheduling_enabled.isChecked():
                                 float_card_popup.scheduler.update_state(config)
-                                float_card_popup.scheduler.start_schedule()
+                                if enabled_schedules(config['scheduling']):
+                                    from . import schedule_engine
+                                    schedule_engine.update_state(config)
+                                else:
+                                    float_card_popup.scheduler.start_schedule()
                             
                             # Minimize Anki main window
                             mw.showMinimized()
                     deck_dialog.accept()
                 
                 button_box.accepted.connect(on_accept)
+                deck_selector.deck_chosen.connect(lambda name: on_accept())
                 button_box.rejected.connect(deck_dialog.reject)
                 
                 # Show the dialog
@@ -205,10 +218,13 @@ def toggle_float_card():
     except Exception as e:
         logger.error(f"Error toggling float card: {str(e)}", exc_info=True)
 
+@tracked("showQuestion hook")
 def update_float_card():
     """Updates the float-card when a new card appears."""
     from . import float_card_popup
     try:
+        if float_card_popup.headless:
+            return  # The popup has its own card
         if float_card_popup.isVisible():
             if mw.reviewer and mw.reviewer.card:
                 logger.info("Updating float card with current reviewer card")
@@ -226,7 +242,7 @@ def show_scheduled_card():
             logger.info("Making float card popup visible for scheduled card")
             float_card_popup.show()
         
-        if mw.reviewer and mw.reviewer.card:
+        if float_card_popup.headless or (mw.reviewer and mw.reviewer.card):
             logger.info("Updating float card with scheduled card")
             float_card_popup.update_card()
         else:
@@ -268,7 +284,7 @@ def setup_menu():
         from . import float_card_popup
         if not hasattr(float_card_popup, 'scheduler'):
             logger.info("Creating new scheduler instance")
-            float_card_popup.scheduler = FloatCardScheduler(show_scheduled_card)
+            float_card_popup.scheduler = FloatCardScheduler(show_scheduled_card, status_func=float_card_popup.set_schedule_status)
             # Update scheduler state with current config
             float_card_popup.scheduler.update_state(config)
         
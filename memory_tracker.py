@@ -0,0 +1,163 @@
+"""Long-session memory growth tracking for the float card popup."""
+
+import gc
+import sys
+import time
+import tracemalloc
+from PyQt6.QtCore import QObject, QTimer
+
+from .logger import setup_logger, setup_diagnostics_logger
+
+# Get logger
+logger = setup_logger()
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Allocations made by the tracking itself are not interesting
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+def process_rss(pid):
+    """Get the resident set size of a process in bytes, or None if unknown."""
+    if not pid:
+        return None
+    if sys.platform.startswith('linux'):
+        try:
+            with open(f"/proc/{pid}/status", 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            return None
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except Exception:
+            return None
+    return None
+
+def renderer_rss(web_view):
+    """Get the resident memory of the web view's renderer process."""
+    try:
+        return process_rss(web_view.page().renderProcessPid())
+    except Exception:
+        return None
+
+def qt_object_counts(root):
+    """Count live Qt objects: children of `root` and PyQt wrappers known to gc."""
+    wrappers = sum(1 for o in gc.get_objects() if type(o).__module__.startswith('PyQt6'))
+    return {
+        "popup_children": len(root.findChildren(QObject)),
+        "pyqt_wrappers": wrappers,
+    }
+
+class MemoryTracker:
+    """Take periodic tracemalloc snapshots and log the fastest growing sites.
+
+    tracemalloc slows allocation down noticeably, so it only runs while the
+    tracker is enabled.
+    """
+
+    def __init__(self, popup, top=10, frames=10):
+        self.popup = popup
+        self.top = top
+        self.frames = frames
+        self.previous = None
+        self.started_tracing = False
+        self.last_summary = None
+        self.report_logger = None
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.diff_now)
+
+    @property
+    def running(self):
+        return self.previous is not None
+
+    def start(self, interval_minutes=10):
+        """Start tracing allocations and take the baseline snapshot."""
+        if self.running:
+            return
+        self.report_logger = setup_diagnostics_logger('memory', 'memory.log')
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started_tracing = True
+        self.previous = self._snapshot()
+        self.timer.start(int(interval_minutes * 60 * 1000))
+        self.report_logger.info(f"Memory tracking started: {self.summary_line(self._measure())}")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.timer.stop()
+        self.previous = None
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def update_state(self, config):
+        """Start or stop tracking based on configuration."""
+        diagnostics = config.get('diagnostics', {})
+        if diagnostics.get('memory_tracker', False):
+            self.start(diagnostics.get('memory_interval_minutes', 10))
+        else:
+            self.stop()
+
+    def diff_now(self):
+        """Compare against the previous snapshot and log the top growing sites.
+
+        Returns:
+            The logged report text
+        """
+        if not self.running:
+            return None
+        try:
+            snapshot = self._snapshot()
+            stats = [s for s in snapshot.compare_to(self.previous, 'lineno') if s.size_diff > 0]
+            self.previous = snapshot
+
+            measurements = self._measure()
+            self.last_summary = measurements
+            lines = [self.summary_line(measurements), f"Top {self.top} growing allocation sites:"]
+            for stat in stats[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f"  {frame.filename}:{frame.lineno}: +{stat.size_diff / 1024:.1f} KiB "
+                    f"({stat.count_diff:+d} blocks, {stat.size / 1024:.1f} KiB total)"
+                )
+            report = "\n".join(lines)
+            self.report_logger.info(report)
+            return report
+        except Exception as e:
+            logger.error(f"Error taking memory snapshot: {str(e)}", exc_info=True)
+            return None
+
+    def _snapshot(self):
+        gc.collect()
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def _measure(self):
+        traced, peak = tracemalloc.get_traced_memory()
+        measurements = {
+            "timestamp": int(time.time()),
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "renderer_rss_bytes": renderer_rss(self.popup.web_view),
+        }
+        measurements.update(qt_object_counts(self.popup))
+        return measurements
+
+    def summary_line(self, m):
+        rss = m["renderer_rss_bytes"]
+        rss_text = f"{rss / 1024 / 1024:.1f} MiB" if rss else "unknown"
+        return (
+            f"traced {m['traced_bytes'] / 1024 / 1024:.1f} MiB (peak {m['traced_peak_bytes'] / 1024 / 1024:.1f} MiB), "
+            f"renderer RSS {rss_text}, popup children {m['popup_children']}, "
+            f"PyQt wrappers {m['pyqt_wrappers']}"
+        )
@@ -0,0 +1,155 @@
+"""In-process metrics and Prometheus text-format export.
+
+The metric objects are plain Python values updated on the Qt main thread,
+where the GIL already serialises access, so incrementing one is a dict
+update with no locking. The exporter renders them periodically to a file a
+node-exporter textfile collector can scrape.
+"""
+
+import os
+import time
+from PyQt6.QtCore import QTimer
+
+from .logger import setup_logger, get_log_dir
+from .memory_tracker import renderer_rss
+
+# Get logger
+logger = setup_logger()
+
+class Counter:
+    """A monotonically increasing counter, optionally split by label values."""
+
+    __slots__ = ("name", "help", "label_names", "values")
+
+    def __init__(self, name, help, label_names=()):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{format_labels(self.label_names, labels)} {value}")
+        return lines
+
+class Gauge:
+    """A value that can go up and down."""
+
+    __slots__ = ("name", "help", "value")
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def render(self):
+        if self.value is None:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+class Histogram:
+    """A cumulative histogram with fixed bucket bounds."""
+
+    __slots__ = ("name", "help", "bounds", "counts", "sum", "count")
+
+    def __init__(self, name, help, bounds):
+        self.name = name
+        self.help = help
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+CARDS_SHOWN = Counter("float_cards_cards_shown_total", "Cards shown in the float popup.")
+GRADES = Counter("float_cards_grades_total", "Cards graded from the float popup, by ease.", ("ease",))
+RENDER_SECONDS = Histogram(
+    "float_cards_render_seconds", "Time from setHtml to the card page finishing loading.",
+    (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+CONFIG_WRITES = Counter("float_cards_config_writes_total", "Configuration file writes.")
+SCHEDULER_TICKS = Counter(
+    "float_cards_scheduler_ticks_total", "Scheduler ticks, by result (fired, deferred, skipped, no_card).", ("result",)
+)
+RENDERER_MEMORY = Gauge("float_cards_renderer_memory_bytes", "Resident memory of the card renderer process.")
+
+METRICS = (CARDS_SHOWN, GRADES, RENDER_SECONDS, CONFIG_WRITES, SCHEDULER_TICKS, RENDERER_MEMORY)
+
+def render_metrics():
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Periodically write the metrics to a file, atomically and rate-limited."""
+
+    MIN_INTERVAL = 15  # seconds
+
+    def __init__(self, popup):
+        self.popup = popup
+        self.path = None
+        self.last_text = None
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.write)
+
+    def update_state(self, config):
+        """Start or stop exporting based on configuration."""
+        diagnostics = config.get('diagnostics', {})
+        if not diagnostics.get('metrics_export', False):
+            self.timer.stop()
+            return
+        self.path = diagnostics.get('metrics_path') or os.path.join(get_log_dir(), 'float_cards.prom')
+        interval = max(self.MIN_INTERVAL, diagnostics.get('metrics_interval_seconds', 60))
+        self.timer.start(int(interval * 1000))
+        self.write()
+
+    def write(self):
+        """Write the metrics file if anything changed since the last write."""
+        try:
+            RENDERER_MEMORY.set(renderer_rss(self.popup.web_view))
+
+            text = render_metrics()
+            if text == self.last_text:
+                return
+            # Write next to the target and rename, so scrapers never see a partial file
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.write(f"# Written at {int(time.time())}\n")
+            os.replace(tmp_path, self.path)
+            self.last_text = text
+        except Exception as e:
+            logger.error(f"Error writing metrics: {str(e)}", exc_info=True)
@@ -0,0 +1,86 @@
+"""On-demand CPU profiling for the float card popup."""
+
+import cProfile
+import io
+import os
+import pstats
+import time
+from PyQt6.QtCore import QTimer
+
+from .logger import setup_logger, get_log_dir
+
+# Get logger
+logger = setup_logger()
+
+class ProfileSession:
+    """Profile the popup for the next N cards or N seconds.
+
+    cProfile is only enabled while a session is running, so an idle session
+    costs nothing beyond the ``active`` check in the popup.
+    """
+
+    def __init__(self):
+        self.profiler = None
+        self.card_limit = 0
+        self.cards_seen = 0
+        self.started_at = 0.0
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.stop)
+
+    @property
+    def active(self):
+        return self.profiler is not None
+
+    def start(self, cards=0, seconds=0):
+        """Start profiling until `cards` more cards were shown or `seconds` elapsed.
+
+        Whichever limit is reached first ends the session; a limit of 0 is
+        ignored. With both limits at 0 the session runs until stopped.
+        """
+        if self.active:
+            return
+        self.card_limit = cards
+        self.cards_seen = 0
+        self.started_at = time.time()
+        if seconds:
+            self.timer.start(int(seconds * 1000))
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        logger.debug(f"Profiling started: cards={cards}, seconds={seconds}")
+
+    def card_shown(self):
+        """Count a newly shown card and stop once the card limit is exceeded."""
+        if not self.active:
+            return
+        self.cards_seen += 1
+        if self.card_limit and self.cards_seen > self.card_limit:
+            self.stop()
+
+    def stop(self):
+        """Stop profiling and write the results to the logs directory.
+
+        Returns:
+            Path of the text summary, or None if no session was running
+        """
+        if not self.active:
+            return None
+        self.profiler.disable()
+        self.timer.stop()
+        profiler, self.profiler = self.profiler, None
+
+        try:
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+            base = os.path.join(get_log_dir(), f"profile-{stamp}")
+            profiler.dump_stats(base + ".pstats")
+
+            stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(60)
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(f"Profiled {self.cards_seen} cards over {time.time() - self.started_at:.1f}s\n")
+                f.write(stream.getvalue())
+            return base + ".txt"
+        except Exception as e:
+            logger.error(f"Error writing profile: {str(e)}", exc_info=True)
+            return None
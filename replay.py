@@ -0,0 +1,133 @@
+"""Review session recording for deterministic performance replays.
+
+A recording captures the key presses the popup handled, the showQuestion
+hook firings and scheduler ticks with their relative timing, plus the HTML
+of every card that was shown. `benchmarks/replay_session.py` plays it back
+headlessly against the popup and scheduler.
+"""
+
+import json
+import os
+import time
+from aqt import mw
+
+from .config import get_user_files_dir
+from .logger import setup_logger
+from . import watchdog
+
+# Get logger
+logger = setup_logger()
+
+SESSION_VERSION = 1
+
+# Operations that become replayable events (see watchdog.operation)
+RECORDED_OPERATIONS = {
+    "showQuestion hook": "hook",
+    "scheduler.exec_schedule": "tick",
+}
+
+def get_sessions_dir():
+    """Get the folder recorded sessions are saved to."""
+    path = os.path.join(get_user_files_dir(), "sessions")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+class SessionRecorder:
+    """Record a review session as a replayable event log."""
+
+    def __init__(self, card_func=None):
+        """Initialize the recorder.
+
+        Args:
+            card_func: Function returning the card on screen; defaults to the
+                main reviewer's card
+        """
+        self.card_func = card_func
+        self.started = None
+        self.started_at = 0.0
+        self.events = []
+        self.cards = {}
+
+    @property
+    def active(self):
+        return self.started is not None
+
+    def start(self):
+        if self.active:
+            return
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.events = []
+        self.cards = {}
+        watchdog.add_operation_observer(self)
+        self._record_card(self._current_card())
+
+    def stop(self):
+        """Stop recording and save the session.
+
+        Returns:
+            Path of the saved session file, or None if nothing was recorded
+        """
+        if not self.active:
+            return None
+        watchdog.remove_operation_observer(self)
+        self.started = None
+        try:
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+            path = os.path.join(get_sessions_dir(), f"session-{stamp}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": SESSION_VERSION,
+                    "recorded_at": int(self.started_at),
+                    "events": self.events,
+                    "cards": self.cards,
+                }, f)
+            return path
+        except Exception as e:
+            logger.error(f"Error saving session recording: {str(e)}", exc_info=True)
+            return None
+
+    def key_pressed(self, event):
+        """Record a key event handled by the popup."""
+        self._add({
+            "type": "key",
+            "key": event.key(),
+            "text": event.text(),
+            "modifiers": event.modifiers().value,
+        })
+
+    def card_shown(self, card):
+        """Remember the HTML of a card the popup rendered."""
+        self._record_card(card)
+
+    def operation_started(self, name):
+        event_type = RECORDED_OPERATIONS.get(name)
+        if event_type is None:
+            return
+        card = self._current_card()
+        self._add({"type": event_type, "card_id": card.id if card else None})
+
+    def operation_finished(self, name):
+        pass
+
+    def _add(self, event):
+        event["t"] = round(time.perf_counter() - self.started, 6)
+        self.events.append(event)
+
+    def _current_card(self):
+        if self.card_func is not None:
+            return self.card_func()
+        return mw.reviewer.card if mw.reviewer else None
+
+    def _record_card(self, card):
+        if card is None or str(card.id) in self.cards:
+            return
+        try:
+            self.cards[str(card.id)] = {
+                "q": card.q(),
+                "a": card.a(),
+                "css": card.css(),
+                "note_type": card.note_type()['name'],
+            }
+        except Exception as e:
+            logger.error(f"Error recording card {card.id}: {str(e)}", exc_info=True)
@@ -0,0 +1,158 @@
+"""Several schedules served by one timer.
+
+Each entry of `scheduling.schedules` gets its own FloatCardScheduler, so
+backoff, due-time mode and auto-tune work per schedule. Instead of a QTimer
+each, the schedulers get lightweight EngineTimers whose due times live in one
+heap; the engine keeps a single QTimer armed for the earliest of them. When
+several schedules come due together, the highest priority one fires and the
+others are deferred by `scheduling.collision_delay_minutes`.
+"""
+
+import heapq
+import itertools
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from .logger import setup_logger
+from .scheduler import FloatCardScheduler, enabled_schedules
+
+# Get logger
+logger = setup_logger()
+
+# Keys a schedule inherits from the `scheduling` section unless it sets them
+INHERITED_KEYS = ("mode", "max_backoff_minutes", "max_defer_minutes", "auto_tune", "auto_close_on_answer", "burst_cards", "burst_seconds")
+
+class EngineTimer(QObject):
+    """The QTimer interface FloatCardScheduler uses, backed by a ScheduleEngine."""
+
+    timeout = pyqtSignal()
+
+    def __init__(self, engine, priority=0):
+        super().__init__()
+        self.engine = engine
+        self.priority = priority
+        self.interval = 0
+        self.active = False
+        # Bumped on every start/stop so stale heap entries can be recognised
+        self.generation = 0
+
+    def setSingleShot(self, single_shot):
+        pass  # Always single-shot
+
+    def isActive(self):
+        return self.active
+
+    def start(self, msec=None):
+        if msec is not None:
+            self.interval = msec
+        self.generation += 1
+        self.active = True
+        self.engine.schedule(self, self.engine.clock() + self.interval / 1000)
+
+    def stop(self):
+        self.generation += 1
+        self.active = False
+
+class ScheduleEngine:
+    """Serve a list of schedules from a heap of due times and one QTimer."""
+
+    def __init__(self, popup, clock=time.time, timer_factory=QTimer):
+        self.popup = popup
+        self.clock = clock
+        self.collision_delay = 2 * 60
+        self.heap = []  # (fire_at, -priority, seq, generation, timer)
+        self.seq = itertools.count()
+        self.schedulers = []
+        self.timer = timer_factory()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timer)
+
+    @property
+    def active(self):
+        return bool(self.schedulers)
+
+    def schedule(self, timer, fire_at):
+        """Add a due time for `timer` and re-arm if it is now the earliest."""
+        heapq.heappush(self.heap, (fire_at, -timer.priority, next(self.seq), timer.generation, timer))
+        # Drop stale entries once they dominate, so re-arming can't grow the heap
+        if len(self.heap) > 4 * max(len(self.schedulers), 1) + 16:
+            self.heap = [entry for entry in self.heap if self._live(entry)]
+            heapq.heapify(self.heap)
+        if self.heap[0][4] is timer:
+            self._arm()
+
+    def _live(self, entry):
+        timer = entry[4]
+        return timer.active and entry[3] == timer.generation
+
+    def _arm(self):
+        """Arm the QTimer for the earliest live due time."""
+        while self.heap and not self._live(self.heap[0]):
+            heapq.heappop(self.heap)
+        if not self.heap:
+            self.timer.stop()
+            return
+        delay_ms = max(0, int((self.heap[0][0] - self.clock()) * 1000))
+        self.timer.start(delay_ms)
+
+    def _on_timer(self):
+        """Fire the highest priority due schedule and defer the others."""
+        now = self.clock()
+        due = []
+        while self.heap and self.heap[0][0] <= now + 1:
+            entry = heapq.heappop(self.heap)
+            if self._live(entry):
+                due.append(entry)
+        if due:
+            # Heap order is (time, priority); collisions go to the highest priority
+            due.sort(key=lambda entry: (entry[1], entry[0], entry[2]))
+            winner = due[0][4]
+            for entry in due[1:]:
+                timer = entry[4]
+                logger.info(f"Schedule collision: deferring a priority {timer.priority} schedule")
+                heapq.heappush(self.heap, (now + self.collision_delay, entry[1], next(self.seq), entry[3], timer))
+            winner.active = False
+            winner.timeout.emit()
+        self._arm()
+
+    def stop(self):
+        for scheduler in self.schedulers:
+            scheduler.stop_schedule()
+        self.schedulers = []
+        self.heap = []
+        self.timer.stop()
+
+    def update_state(self, config):
+        """Rebuild the schedulers from `scheduling.schedules`."""
+        self.stop()
+        sched_config = config.get('scheduling', {})
+        self.collision_delay = sched_config.get('collision_delay_minutes', 2) * 60
+        schedules = enabled_schedules(sched_config)
+        if not sched_config.get('enabled', False) or not schedules:
+            return
+
+        # Only the highest priority schedule shows a card straight away
+        first = max(schedules, key=lambda s: s.get('priority', 0))
+        for schedule in schedules:
+            name = schedule.get('name') or schedule.get('search') or schedule.get('deck', "Default")
+            merged = {key: sched_config[key] for key in INHERITED_KEYS if key in sched_config}
+            merged.update(schedule)
+            merged['enabled'] = True
+
+            scheduler = FloatCardScheduler(
+                lambda merged=merged: self._show(merged),
+                clock=self.clock,
+                timer_factory=lambda priority=schedule.get('priority', 0): EngineTimer(self, priority),
+                status_func=lambda status, name=name: self.popup.set_schedule_status(
+                    f"{name}: {status}" if status else None
+                )
+            )
+            scheduler.show_on_start = schedule is first
+            scheduler.update_state({**config, 'scheduling': merged})
+            self.schedulers.append(scheduler)
+        logger.info(f"Schedule engine serving {len(self.schedulers)} schedules")
+
+    def _show(self, schedule):
+        """Show the popup with the schedule's own settings."""
+        self.popup.schedule_settings = dict(schedule)
+        self.popup.show_popup()
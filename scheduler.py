@@ -2,104 +2,450 @@ from PyQt6.QtCore import QTimer
 import time
 import logging
 from aqt import mw
+from aqt.operations import QueryOp
 from .config import Config
 from aqt.utils import showInfo, tooltip
+from anki.hooks import addHook, remHook
+from .watchdog import tracked
+from .metrics import SCHEDULER_TICKS
+from .invalidation import bus, DECK, STUDY_QUEUES
+from .card_source import get_source
+from .ticker import ticker_running
+from . import autotune
 
 logger = logging.getLogger(__name__)
 
+# Main window states a scheduled card may switch away from
+REVIEWABLE_STATES = ("deckBrowser", "overview", "review")
+# How often a deferred fire checks whether Anki is still busy
+DEFER_POLL_SECONDS = 5
+
+def enabled_schedules(sched_config):
+    """The entries of `scheduling.schedules` that ScheduleEngine serves."""
+    return [s for s in sched_config.get('schedules', []) if s.get('enabled', True)]
+
+class DeckLookup:
+    """Deck names resolved to ids, kept until decks are renamed, added or removed."""
+
+    def __init__(self):
+        self.entries = {}
+        bus.register("deck_lookup", self.evict, (DECK,))
+
+    def get(self, name):
+        """(deck id, SQL list of it and its children's ids), or None if there is no such deck."""
+        if name not in self.entries:
+            deck = mw.col.decks.by_name(name)
+            if deck:
+                child_ids = ",".join(str(did) for did in mw.col.decks.deck_and_child_ids(deck['id']))
+                self.entries[name] = (deck['id'], child_ids)
+            else:
+                self.entries[name] = None
+        return self.entries[name]
+
+    def evict(self, scope, keys):
+        self.entries.clear()
+
+# Shared by all schedulers; each tick and re-arm looks its deck up
+deck_lookup = DeckLookup()
+
 class FloatCardScheduler:
-    def __init__(self, show_card_func):
+    def __init__(self, show_card_func, clock=time.time, timer_factory=QTimer, status_func=None,
+                 poll_timer_factory=QTimer):
         """Initialize the scheduler.
         
         Args:
             show_card_func: Function to call when it's time to show a card
+            clock: Function returning the current time in seconds since the epoch
+            timer_factory: Callable creating a QTimer-compatible single-shot timer
+            status_func: Optional function called with a status text while
+                backing off, and with None once cards are shown again
+            poll_timer_factory: Like `timer_factory`, for the busy-retry poll;
+                kept apart so the poll never competes with schedules in
+                ScheduleEngine's heap
         """
         self.show_card_func = show_card_func
+        self.status_func = status_func
         self.schedule_interval = 30  # Default 30 minutes
         self.current_deck = "Default"
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.exec_schedule)
+        self.clock = clock
+        self.timer = timer_factory()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timer)
         self.enabled = False
+        # Time the next scheduled card is due, in clock() seconds
+        self.next_fire = None
+        # "fixed" fires every interval; "due_time" also fires when learning cards come due
+        self.mode = "fixed"
+        # Due time of the learning card the timer is armed for, if any
+        self.learning_due = None
+        # Consecutive ticks without a card; each one doubles the wait
+        self.backoff_level = 0
+        self.max_backoff = 240  # minutes
+        # Local "HH:MM-HH:MM" window outside which ticks are skipped; empty = always
+        self.active_hours = ""
+        # Whether start_schedule shows a card right away
+        self.show_on_start = True
+        # Headless review mode leaves the main window's reviewer alone
+        self.headless = False
+        # Auto-tune settings and the due count seen on the last tick
+        self.auto_tune = {}
+        self.due_cards = None
+        # Whether a deck check is running in the background
+        self.checking = False
+        # Cards matching `scheduling.search`, used instead of the deck in headless mode
+        self.card_source = None
+        # When the pending fire was first deferred because Anki was busy
+        self.deferred_since = None
+        self.max_defer = 10  # minutes
+        self.defer_timer = poll_timer_factory()
+        self.defer_timer.setSingleShot(True)
+        self.defer_timer.timeout.connect(self._retry_deferred)
+        
+        # Counters for diagnostics and soak tests
+        self.ticks_fired = 0
+        self.cards_shown = 0
+        self.no_card_ticks = 0
+        self.backoffs = 0
+        self.deferrals = 0
         
     def set_schedule(self, interval_minutes):
         """Set the schedule interval in minutes."""
         logger.info(f"Setting schedule interval to {interval_minutes} minutes")
         self.schedule_interval = interval_minutes
         
+    def _arm(self):
+        """Arm the single-shot timer for the next fire time."""
+        fire_at = self.next_fire
+        self.learning_due = None
+        if self.mode == "due_time":
+            learning_due = self._next_learning_due()
+            if learning_due is not None and learning_due < fire_at:
+                self.learning_due = fire_at = learning_due
+        delay_ms = max(0, int((fire_at - self.clock()) * 1000))
+        self.timer.start(delay_ms)
+
+    def _deck_ids(self):
+        """Ids of the scheduled deck and its children as an SQL list, or None."""
+        deck = deck_lookup.get(self.current_deck)
+        return deck[1] if deck else None
+
+    def _next_learning_due(self):
+        """Earliest upcoming due time of a learning card in the deck, or None."""
+        try:
+            deck_ids = self._deck_ids()
+            if not deck_ids:
+                return None
+            # Intraday learning cards (queue 1) are due at a timestamp in seconds
+            return mw.col.db.scalar(
+                f"select min(due) from cards where queue = 1 and did in ({deck_ids}) and due > ?",
+                int(self.clock())
+            )
+        except Exception as e:
+            logger.debug(f"Could not look up learning due times: {e}")
+            return None
+
+    def _cards_may_be_due(self):
+        """Cheap check for due cards that doesn't switch decks.
+
+        New cards are counted without daily limits, so this can say yes when
+        the scheduler has nothing to show; the full tick then backs off again.
+        """
+        if self.card_source is not None:
+            return True  # Searches are refreshed by the full tick, at most every few minutes
+        try:
+            deck_ids = self._deck_ids()
+            if not deck_ids:
+                return True
+            return mw.col.db.scalar(
+                f"select 1 from cards where did in ({deck_ids}) and "
+                f"(queue = 0 or (queue in (2, 3) and due <= ?) or (queue = 1 and due <= ?)) limit 1",
+                mw.col.sched.today, int(self.clock())
+            ) is not None
+        except Exception as e:
+            logger.debug(f"Could not check for due cards: {e}")
+            return True
+
+    def _in_active_hours(self):
+        """Whether the clock is inside the configured active hours."""
+        if not self.active_hours:
+            return True
+        try:
+            start, end = (
+                int(part.split(":")[0]) * 60 + int(part.split(":")[1])
+                for part in self.active_hours.split("-")
+            )
+        except (ValueError, IndexError):
+            logger.warning(f"Ignoring invalid active hours: {self.active_hours}")
+            return True
+        local = time.localtime(self.clock())
+        minute = local.tm_hour * 60 + local.tm_min
+        if start <= end:
+            return start <= minute < end
+        return minute >= start or minute < end  # Window spans midnight
+
+    def _back_off(self, reason):
+        """Wait progressively longer before the next tick instead of stopping."""
+        self.backoff_level += 1
+        self.backoffs += 1
+        delay = min(self.schedule_interval * 2 ** min(self.backoff_level, 16), self.max_backoff)
+        delay = max(delay, self.schedule_interval)
+        self.next_fire = self.clock() + delay * 60
+        self._arm()
+        logger.info(f"{reason}; checking again in {delay} minutes")
+        if self.status_func:
+            self.status_func(f"{reason}, checking again at {time.strftime('%H:%M', time.localtime(self.next_fire))}")
+
+    def _resume(self):
+        """Return to the normal cadence after backing off."""
+        logger.info("Cards available again, resuming normal schedule")
+        self.backoff_level = 0
+        self.next_fire = self.clock() + self.schedule_interval * 60
+        self._arm()
+        if self.status_func:
+            self.status_func(None)
+
+    def _on_review_progress(self, *args):
+        """Re-arm after a card was answered, as it may have a new learning step."""
+        if self.enabled and self.mode == "due_time":
+            self._arm()
+
+    def _on_study_queues(self, scope, keys):
+        """The study queues changed, e.g. after an answer in the popup or the main window."""
+        self._on_review_progress()
+
+    def _on_timer(self):
+        """Advance the schedule on a fixed grid, so late ticks don't accumulate drift."""
+        if not self.enabled:
+            return
+        interval = self.schedule_interval * 60
+        now = self.clock()
+        if self.learning_due is not None and now >= self.learning_due - 1 and now < self.next_fire - 1:
+            # Woken for a learning card; the fixed grid stays where it is
+            self._arm()
+            if self._in_active_hours():
+                self.exec_schedule()
+            return
+        if now < self.next_fire - 1:
+            # Coarse timers may fire slightly early; wait out the remainder
+            self._arm()
+            return
+        if self.backoff_level and not self._cards_may_be_due():
+            self.no_card_ticks += 1
+            SCHEDULER_TICKS.inc("no_card")
+            self._back_off(f"No cards due in {self.current_deck}")
+            return
+        self.next_fire += interval
+        while self.next_fire <= now + 1:
+            # A tick was missed entirely, e.g. while the machine slept
+            self.next_fire += interval
+            SCHEDULER_TICKS.inc("skipped")
+        self._arm()
+        if not self._in_active_hours():
+            return
+        self.exec_schedule()
+
+    def _retune(self):
+        """Pick the next interval from recent popup outcomes (auto-tune mode)."""
+        if not self.enabled:
+            return
+        interval = autotune.next_interval(
+            self.schedule_interval,
+            list(autotune.outcomes.recent),
+            self.due_cards,
+            autotune.seconds_until(self.auto_tune.get('target_time', "22:00"), self.clock()),
+            self.auto_tune.get('min_frequency', 5),
+            self.auto_tune.get('max_frequency', 120)
+        )
+        if interval != self.schedule_interval:
+            logger.info(f"Auto-tune: changing frequency from {self.schedule_interval} to {interval} minutes")
+            self.schedule_interval = interval
+            self.next_fire = self.clock() + interval * 60
+            self._arm()
+
+    @staticmethod
+    def _count_due(col, deck_id):
+        """Cards due in `deck_id` with its daily limits; runs on a background thread."""
+        node = col.sched.deck_due_tree(deck_id)
+        if node is None:
+            return 0
+        return node.new_count + node.learn_count + node.review_count
+
+    def _busy_reason(self):
+        """Why a card shouldn't be shown right now, or None if Anki is idle."""
+        if getattr(mw, '_background_op_count', 0):
+            return "a collection operation is running"
+        progress = getattr(mw, 'progress', None)
+        if progress is not None and progress.busy():
+            return "a progress window is open"  # Sync, check database, import...
+        app = getattr(mw, 'app', None)
+        if app is not None and app.activeModalWidget() is not None:
+            return "a dialog is open"
+        if ticker_running():
+            return "the ticker is running"
+        state = getattr(mw, 'state', None)
+        if not self.headless and state not in REVIEWABLE_STATES:
+            return f"the main window is in the {state} state"
+        return None
+
+    def _defer(self, reason):
+        """Retry the fire shortly, or skip it once it has waited `max_defer` minutes."""
+        now = self.clock()
+        if self.deferred_since is None:
+            self.deferred_since = now
+            self.deferrals += 1
+            SCHEDULER_TICKS.inc("deferred")
+            logger.info(f"Anki is busy ({reason}), deferring the scheduled card")
+        elif now - self.deferred_since >= self.max_defer * 60:
+            logger.warning(f"Anki still busy ({reason}) after {self.max_defer} minutes, skipping the scheduled card")
+            SCHEDULER_TICKS.inc("skipped")
+            self.deferred_since = None
+            return
+        self.defer_timer.start(DEFER_POLL_SECONDS * 1000)
+
+    def _retry_deferred(self):
+        if self.enabled and self.deferred_since is not None:
+            self.exec_schedule()
+
+    @tracked("scheduler.exec_schedule")
     def exec_schedule(self):
-        """Execute the scheduled task - show a card."""
-        logger.info(f"Executing schedule at {time.ctime()}")
+        """Execute the scheduled task - show a card.
+
+        The deck's due cards are counted by a background query, so a large
+        collection doesn't stall the GUI; the card is shown once it returns.
+        While Anki is busy the fire is deferred instead.
+        """
+        reason = self._busy_reason()
+        if reason:
+            self._defer(reason)
+            return
+        self.deferred_since = None
+
+        logger.info(f"Executing schedule at {time.ctime(self.clock())}")
+        self.ticks_fired += 1
+        SCHEDULER_TICKS.inc("fired")
         
         # Check if collection is loaded
         if not mw.col:
             logger.error("Collection not loaded")
+            self._back_off("Collection not loaded")
+            return
+
+        if self.checking:
+            logger.info("Previous deck check still running, skipping this tick")
+            SCHEDULER_TICKS.inc("skipped")
+            return
+
+        if self.card_source is not None:
+            # The popup samples its card from the search; the current deck stays
+            self.checking = True
+            try:
+                self.card_source.refresh(
+                    lambda count: self._on_deck_checked(mw.col.decks.get_current_id(), count),
+                    self._on_check_failed
+                )
+            except Exception as e:
+                self.checking = False
+                logger.error(f"Error searching for cards: {e}", exc_info=True)
+                self._back_off("Error searching for cards")
             return
             
         # Check if we have a valid deck
         try:
-            deck = mw.col.decks.by_name(self.current_deck)
+            deck = deck_lookup.get(self.current_deck)
             if not deck:
                 logger.error(f"Could not find deck: {self.current_deck}")
                 tooltip(f"Could not find deck: {self.current_deck}")
                 self.stop_schedule()
                 return
                 
-            logger.info(f"Found deck: {self.current_deck} (id: {deck['id']})")
-                
-            # Save current deck
-            old_deck = mw.col.decks.current()
-            logger.info(f"Current deck before switch: {old_deck['name']}")
-                
-            try:
-                # Set the deck as current
-                mw.col.decks.select(deck['id'])
-                logger.info(f"Switched to deck: {self.current_deck}")
-                
-                # Move to review state if needed
-                if not self._ensure_review_state():
-                    logger.error("Failed to ensure review state")
-                    return
-                    
-                # Try to get a card
-                card = mw.col.sched.getCard()
-                if card:
-                    logger.info(f"Got card {card.id} from deck {self.current_deck}")
-                    # Show the popup and update it with the current card
-                    self.show_card_func()
-                    tooltip(f"Showing scheduled card from deck: {self.current_deck}")
-                else:
-                    logger.warning(f"No cards available in deck: {self.current_deck}")
-                    tooltip(f"No cards available in deck: {self.current_deck}")
-                    self.stop_schedule()
-            except Exception as e:
-                logger.error(f"Error in exec_schedule: {e}", exc_info=True)
-            finally:
-                # Restore previous deck
-                if old_deck:
-                    logger.info(f"Restoring previous deck: {old_deck['name']}")
-                    mw.col.decks.select(old_deck['id'])
+            deck_id = deck[0]
+            logger.info(f"Found deck: {self.current_deck} (id: {deck_id})")
+            self.checking = True
+            QueryOp(
+                parent=mw,
+                op=lambda col: self._count_due(col, deck_id),
+                success=lambda due: self._on_deck_checked(deck_id, due)
+            ).failure(self._on_check_failed).run_in_background()
         except Exception as e:
+            self.checking = False
             logger.error(f"Error accessing collection: {e}", exc_info=True)
-            self.stop_schedule()
+            self._back_off("Error accessing the collection")
+
+    def _on_check_failed(self, error):
+        self.checking = False
+        logger.error(f"Error checking deck {self.current_deck}: {error}", exc_info=error)
+        if self.enabled:
+            self._back_off("Error getting a card")
+
+    @tracked("scheduler.show_card")
+    def _on_deck_checked(self, deck_id, due):
+        """Show the popup on the scheduled deck if the background check found cards."""
+        self.checking = False
+        if not self.enabled:
+            return  # Stopped while the check ran
+        # A search counts matching cards, which need not be due; auto-tune gets no backlog estimate
+        self.due_cards = due if self.card_source is None else None
+        if not due:
+            logger.warning(f"No cards available in {self.source_name}")
+            tooltip(f"No cards available in {self.source_name}")
+            self.no_card_ticks += 1
+            SCHEDULER_TICKS.inc("no_card")
+            self._back_off(f"No cards due in {self.source_name}")
+            return
+
+        # Save current deck
+        old_deck = mw.col.decks.current()
+        logger.info(f"Current deck before switch: {old_deck['name']}")
+        try:
+            # Set the deck as current
+            mw.col.decks.select(deck_id)
+            logger.info(f"Switched to deck: {self.current_deck}")
 
+            # Move to review state if needed; headless popups review by themselves
+            if not self.headless and not self._ensure_review_state():
+                logger.error("Failed to ensure review state")
+                self._back_off(f"No cards due in {self.current_deck}")
+                return
+
+            logger.info(f"{due} cards due in {self.source_name}")
+            # Show the popup and update it with the current card
+            self.show_card_func()
+            self.cards_shown += 1
+            tooltip(f"Showing scheduled card from {self.source_name}")
+            if self.backoff_level:
+                self._resume()
+        except Exception as e:
+            logger.error(f"Error in exec_schedule: {e}", exc_info=True)
+            self._back_off("Error getting a card")
+        finally:
+            # Restore previous deck
+            if old_deck:
+                logger.info(f"Restoring previous deck: {old_deck['name']}")
+                mw.col.decks.select(old_deck['id'])
+        if self.auto_tune.get('enabled', False) and not self.backoff_level:
+            self._retune()
+
+    @property
+    def source_name(self):
+        """What the cards come from, for messages."""
+        if self.card_source is not None:
+            return f"search: {self.card_source.query}"
+        return f"deck: {self.current_deck}"
+
+    @tracked("scheduler.ensure_review_state")
     def _ensure_review_state(self):
-        """Ensure we're in review state with the correct deck."""
+        """Ensure we're in review state with the correct deck.
+
+        Only called once the background check has found due cards.
+        """
         try:
             logger.info("Checking review state...")
             # If we're not in review state or no card is selected
             if not mw.reviewer or not mw.reviewer.card:
-                logger.info("No active reviewer or card, attempting to start review")
-                # Try to get a card directly
-                card = mw.col.sched.getCard()
-                if card:
-                    logger.info("Card available, moving to review state")
-                    mw.onOverview()
-                    mw.moveToState('review')
-                    return True
-                else:
-                    logger.warning("No cards available for review")
-                    tooltip("No cards available for review")
-                    return False
+                logger.info("No active reviewer or card, moving to review state")
+                mw.onOverview()
+                mw.moveToState('review')
+                return True
             logger.info("Review state is good")
             return True
         except Exception as e:
@@ -108,22 +454,37 @@ class FloatCardScheduler:
         
     def start_schedule(self):
         """Start the scheduling timer."""
-        logger.info(f"Starting schedule at {time.ctime()}")
-        # Convert minutes to milliseconds
-        interval_ms = self.schedule_interval * 60 * 1000
-        logger.info(f"Setting timer interval to {interval_ms}ms ({self.schedule_interval} minutes)")
-        self.timer.start(interval_ms)
+        logger.info(f"Starting schedule at {time.ctime(self.clock())}")
+        logger.info(f"Setting timer interval to {self.schedule_interval} minutes")
+        self.next_fire = self.clock() + self.schedule_interval * 60
         self.enabled = True
+        self._arm()
+        remHook("showQuestion", self._on_review_progress)
+        addHook("showQuestion", self._on_review_progress)
+        # Headless answers don't reach the reviewer's showQuestion hook
+        bus.register(f"scheduler:{id(self)}", self._on_study_queues, (STUDY_QUEUES,))
         
         # Show first card immediately
-        logger.info("Showing first card immediately")
-        self.exec_schedule()
+        if self.show_on_start and self._in_active_hours():
+            logger.info("Showing first card immediately")
+            self.exec_schedule()
         
     def stop_schedule(self):
         """Stop the scheduling timer."""
-        logger.info(f"Stopping schedule at {time.ctime()}")
+        logger.info(f"Stopping schedule at {time.ctime(self.clock())}")
         self.timer.stop()
+        self.defer_timer.stop()
+        remHook("showQuestion", self._on_review_progress)
+        bus.unregister(f"scheduler:{id(self)}")
         self.enabled = False
+        self.checking = False
+        self.deferred_since = None
+        self.next_fire = None
+        self.learning_due = None
+        if self.backoff_level:
+            self.backoff_level = 0
+            if self.status_func:
+                self.status_func(None)
         tooltip("Scheduled review stopped")
         
     def update_state(self, config=None):
@@ -133,8 +494,19 @@ class FloatCardScheduler:
         
         sched_config = config.get('scheduling', {})
         new_interval = sched_config.get('frequency', 30)
-        new_enabled = sched_config.get('enabled', False)
+        # With enabled entries in `schedules`, ScheduleEngine serves them instead
+        new_enabled = sched_config.get('enabled', False) and not enabled_schedules(sched_config)
         new_deck = sched_config.get('deck', "Default")
+        self.auto_tune = sched_config.get('auto_tune', {})
+        self.mode = sched_config.get('mode', "fixed")
+        self.max_backoff = sched_config.get('max_backoff_minutes', 240)
+        self.active_hours = sched_config.get('active_hours', "")
+        self.max_defer = sched_config.get('max_defer_minutes', 10)
+        self.headless = config.get('review_mode', "reviewer") == "headless"
+        search = sched_config.get('search', "").strip()
+        if search and not self.headless:
+            logger.warning("scheduling.search needs review_mode \"headless\"; using the deck instead")
+        self.card_source = get_source(search) if search and self.headless else None
         
         logger.info(f"Updating scheduler state: enabled={new_enabled}, interval={new_interval}, deck={new_deck}")
         
@@ -0,0 +1,234 @@
+"""Review event history for the Float Cards addon.
+
+Every answer given in the popup, and every answer given in Anki's own
+reviewer, is kept as a small record. Records are buffered on the main thread
+and written in batches to a SQLite database in user_files by a background
+writer thread, so grading never waits on the disk.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from PyQt6.QtCore import QTimer
+from aqt import gui_hooks
+
+from .config import get_user_files_dir
+from .logger import setup_logger
+
+# Get logger
+logger = setup_logger()
+
+# Where a review came from
+ORIGIN_SCHEDULED = "scheduled"  # popup opened by the scheduler
+ORIGIN_MANUAL = "manual"  # popup opened by the user
+ORIGIN_MAIN = "main"  # Anki's own reviewer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS review_events (
+    id INTEGER PRIMARY KEY,
+    card_id INTEGER NOT NULL,
+    ease INTEGER NOT NULL,
+    time_to_answer_ms INTEGER,
+    popup_shown_at REAL,
+    answered_at REAL NOT NULL,
+    origin TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS review_events_answered_at ON review_events (answered_at);
+CREATE TABLE IF NOT EXISTS review_hourly (
+    hour INTEGER NOT NULL,
+    origin TEXT NOT NULL,
+    reviews INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    answer_ms_sum INTEGER NOT NULL DEFAULT 0,
+    answer_ms_count INTEGER NOT NULL DEFAULT 0,
+    popups INTEGER NOT NULL DEFAULT 0,
+    response_s_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, origin)
+);
+"""
+
+# Running sums kept per (hour, origin) bucket; see analytics.py
+UPSERT_HOURLY = """
+INSERT INTO review_hourly (hour, origin, reviews, correct, answer_ms_sum, answer_ms_count, popups, response_s_sum)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (hour, origin) DO UPDATE SET
+    reviews = reviews + excluded.reviews,
+    correct = correct + excluded.correct,
+    answer_ms_sum = answer_ms_sum + excluded.answer_ms_sum,
+    answer_ms_count = answer_ms_count + excluded.answer_ms_count,
+    popups = popups + excluded.popups,
+    response_s_sum = response_s_sum + excluded.response_s_sum
+"""
+
+# Rebuild the buckets from the events, for histories recorded before they existed
+REBUILD_HOURLY = (
+    """
+    INSERT INTO review_hourly (hour, origin, reviews, correct, answer_ms_sum, answer_ms_count)
+    SELECT CAST(answered_at / 3600 AS INTEGER), origin, COUNT(*), SUM(ease > 1),
+           TOTAL(time_to_answer_ms), COUNT(time_to_answer_ms)
+    FROM review_events GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO review_hourly (hour, origin, popups, response_s_sum)
+    SELECT CAST(first_answer / 3600 AS INTEGER), origin, COUNT(*), TOTAL(first_answer - popup_shown_at)
+    FROM (SELECT origin, popup_shown_at, MIN(answered_at) AS first_answer FROM review_events
+          WHERE popup_shown_at IS NOT NULL GROUP BY origin, popup_shown_at)
+    GROUP BY 1, 2
+    ON CONFLICT (hour, origin) DO UPDATE SET
+        popups = popups + excluded.popups,
+        response_s_sum = response_s_sum + excluded.response_s_sum
+    """,
+)
+
+
+class ReviewEvent:
+    """One answered card."""
+
+    __slots__ = ("card_id", "ease", "time_to_answer_ms", "popup_shown_at", "answered_at", "origin")
+
+    def __init__(self, card_id, ease, time_to_answer_ms, popup_shown_at, answered_at, origin):
+        self.card_id = card_id
+        self.ease = ease
+        self.time_to_answer_ms = time_to_answer_ms
+        self.popup_shown_at = popup_shown_at
+        self.answered_at = answered_at
+        self.origin = origin
+
+    def row(self):
+        return (self.card_id, self.ease, self.time_to_answer_ms, self.popup_shown_at, self.answered_at, self.origin)
+
+class ReviewTelemetry:
+    """Buffer review events and write them to SQLite off the GUI thread."""
+
+    def __init__(self, filename="reviews.sqlite3", batch_size=50):
+        self.path = os.path.join(get_user_files_dir(), filename)
+        self.batch_size = batch_size
+        self.buffer = []
+        self.batches = queue.Queue()
+        self.writer = None
+        # Writer thread only: the popup the last written event belonged to
+        self.last_popup = None
+        # Cards the popup answered through the reviewer; the hook fires later, from a background op
+        self.popup_answered_ids = set()
+        self.flush_timer = QTimer()
+        self.flush_timer.timeout.connect(self.flush)
+
+    @property
+    def active(self):
+        return self.writer is not None
+
+    def update_state(self, config):
+        """Start or stop recording based on configuration."""
+        diagnostics = config.get('diagnostics', {})
+        if diagnostics.get('review_history', True):
+            self.start(diagnostics.get('review_history_flush_seconds', 30))
+        else:
+            self.stop()
+
+    def start(self, flush_seconds=30):
+        self.flush_timer.start(int(flush_seconds * 1000))
+        if self.active:
+            return
+        self.writer = threading.Thread(target=self._run, name="FloatCardsTelemetry", daemon=True)
+        self.writer.start()
+        gui_hooks.reviewer_did_answer_card.append(self.main_answered)
+
+    def stop(self):
+        """Write out buffered events and stop the writer thread."""
+        if not self.active:
+            return
+        self.flush_timer.stop()
+        if self.main_answered in gui_hooks.reviewer_did_answer_card:
+            gui_hooks.reviewer_did_answer_card.remove(self.main_answered)
+        self.flush()
+        self.batches.put(None)
+        self.writer.join(timeout=5)
+        self.writer = None
+
+    def record(self, card_id, ease, time_to_answer_ms, popup_shown_at, origin):
+        """Buffer an answered card; cheap enough to call while grading."""
+        if not self.active:
+            return
+        self.buffer.append(ReviewEvent(card_id, ease, time_to_answer_ms, popup_shown_at, time.time(), origin))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def answering_in_reviewer(self, card_id):
+        """Note that the popup is answering `card_id` through the reviewer and records it itself."""
+        self.popup_answered_ids.add(card_id)
+
+    def main_answered(self, reviewer, card, ease):
+        """Record an answer given in Anki's reviewer (gui_hooks.reviewer_did_answer_card)."""
+        if card.id in self.popup_answered_ids:
+            self.popup_answered_ids.discard(card.id)
+            return  # Answered from the popup, which records it with its own timing
+        try:
+            time_taken = card.time_taken()
+        except Exception:
+            time_taken = None
+        self.record(card.id, ease, time_taken, None, ORIGIN_MAIN)
+
+    def flush(self):
+        """Hand the buffered events to the writer thread."""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        self.batches.put(batch)
+
+    def connect(self):
+        """Open a connection to the database, creating it if needed."""
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        with conn:
+            if conn.execute("SELECT 1 FROM review_hourly LIMIT 1").fetchone() is None:
+                for statement in REBUILD_HOURLY:
+                    conn.execute(statement)
+        return conn
+
+    def _run(self):
+        """Writer thread: the only thread that writes to the database."""
+        conn = None
+        try:
+            conn = self.connect()
+            while True:
+                batch = self.batches.get()
+                try:
+                    if batch is None:
+                        break
+                    with conn:
+                        self._write_batch(conn, batch)
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing {len(batch)} review events: {str(e)}", exc_info=True)
+                finally:
+                    self.batches.task_done()
+        except Exception as e:
+            logger.error(f"Review history writer stopped: {str(e)}", exc_info=True)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _write_batch(self, conn, batch):
+        conn.executemany(
+            "INSERT INTO review_events (card_id, ease, time_to_answer_ms, popup_shown_at, answered_at, origin) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [event.row() for event in batch]
+        )
+        # Update the hourly running sums in the same transaction
+        buckets = {}
+        for event in batch:
+            bucket = buckets.setdefault((int(event.answered_at // 3600), event.origin), [0, 0, 0, 0, 0, 0.0])
+            bucket[0] += 1
+            bucket[1] += event.ease > 1
+            if event.time_to_answer_ms is not None:
+                bucket[2] += event.time_to_answer_ms
+                bucket[3] += 1
+            if event.popup_shown_at is not None and event.popup_shown_at != self.last_popup:
+                # First answer in this popup
+                self.last_popup = event.popup_shown_at
+                bucket[4] += 1
+                bucket[5] += event.answered_at - event.popup_shown_at
+        conn.executemany(UPSERT_HOURLY, [key + tuple(values) for key, values in buckets.items()])
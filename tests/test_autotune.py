@@ -0,0 +1,75 @@
+"""Tests for autotune.py, which needs no Anki and is loaded on its own.
+
+Run `python -m unittest discover tests` from the add-on folder, or pytest
+from this folder (the add-on's own __init__ needs Anki).
+"""
+
+import importlib.util
+import os
+import time
+import unittest
+
+AUTOTUNE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "autotune.py")
+spec = importlib.util.spec_from_file_location("autotune", AUTOTUNE_PATH)
+autotune = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(autotune)
+
+# Outcomes as recorded by autotune.outcomes: (shown_at, response_s, cards); response None = dismissed
+RECORDED_ANSWERED = [(1000.0, 60.0, 2), (2800.0, 45.0, 2), (4600.0, 90.0, 2), (6400.0, 30.0, 2), (8200.0, 75.0, 2)]
+RECORDED_MIXED = [(1000.0, 60.0, 2), (2800.0, None, 0), (4600.0, 90.0, 2), (6400.0, None, 0), (8200.0, 30.0, 2)]
+
+def outcomes(recorded):
+    recent = autotune.PopupOutcomes()
+    for shown_at, response_s, cards in recorded:
+        recent.record(shown_at, response_s, cards)
+    return list(recent.recent)
+
+class NextIntervalTest(unittest.TestCase):
+    def test_spreads_due_cards_over_the_time_left(self):
+        # 20 cards at 2 per popup = 10 popups in 4 hours
+        interval = autotune.next_interval(30, outcomes(RECORDED_ANSWERED), 20, 4 * 3600, 5, 120)
+        self.assertEqual(interval, 24)
+
+    def test_backs_off_with_the_dismiss_rate(self):
+        # 2 of 5 popups dismissed: 24 minutes * 1.4
+        interval = autotune.next_interval(30, outcomes(RECORDED_MIXED), 20, 4 * 3600, 5, 120)
+        self.assertEqual(interval, 34)
+
+    def test_nothing_due_moves_toward_the_maximum_gradually(self):
+        interval = autotune.next_interval(30, outcomes(RECORDED_ANSWERED), 0, 4 * 3600, 5, 120)
+        self.assertEqual(interval, 60)
+
+    def test_unknown_backlog_keeps_the_interval(self):
+        self.assertEqual(autotune.next_interval(30, [], None, 4 * 3600, 5, 120), 30)
+        self.assertEqual(autotune.next_interval(30, [], 20, None, 5, 120), 30)
+
+    def test_not_faster_than_popups_get_answered(self):
+        slow = [(shown_at, 30 * 60.0, cards) for shown_at, _, cards in RECORDED_ANSWERED]
+        interval = autotune.next_interval(30, outcomes(slow), 20, 4 * 3600, 5, 120)
+        self.assertEqual(interval, 60)
+
+    def test_stays_within_the_bounds(self):
+        # A large backlog asks for far less than the 5 minute minimum
+        self.assertEqual(autotune.next_interval(8, outcomes(RECORDED_ANSWERED), 1000, 3600, 5, 120), 5)
+        self.assertEqual(autotune.next_interval(100, outcomes(RECORDED_ANSWERED), 0, 3600, 5, 120), 120)
+
+class SecondsUntilTest(unittest.TestCase):
+    def setUp(self):
+        local = time.localtime()
+        # 20:00 local time today
+        self.now = time.mktime((local.tm_year, local.tm_mon, local.tm_mday, 20, 0, 0, 0, 0, -1))
+
+    def test_time_later_today(self):
+        self.assertEqual(autotune.seconds_until("22:00", self.now), 2 * 3600)
+        self.assertEqual(autotune.seconds_until("20:30", self.now), 30 * 60)
+
+    def test_time_already_passed_today(self):
+        self.assertIsNone(autotune.seconds_until("19:00", self.now))
+        self.assertIsNone(autotune.seconds_until("20:00", self.now))
+
+    def test_unparseable_time(self):
+        self.assertIsNone(autotune.seconds_until("10pm", self.now))
+        self.assertIsNone(autotune.seconds_until(None, self.now))
+
+if __name__ == "__main__":
+    unittest.main()
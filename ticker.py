@@ -0,0 +1,211 @@
+"""Passive ticker mode: cycle cards in the popup without answering them.
+
+The card ids of the deck or search are loaded once by a background query
+into a compact array. Only the next `ticker.prerender` cards are loaded and
+rendered, one per event loop turn, and their images and sounds are read
+ahead on a background thread. So memory stays flat however large the deck
+is, and nothing is rescheduled.
+"""
+
+import collections
+import os
+import random
+import re
+from array import array
+from PyQt6.QtCore import QTimer
+from aqt import mw
+from aqt.operations import QueryOp
+
+from .config import Config
+from .logger import setup_logger
+from .watchdog import tracked
+from .invalidation import bus, NOTE, NOTETYPE, CARD, DECK, COLLECTION
+
+# Get logger
+logger = setup_logger()
+
+# Local media referenced by a rendered page
+MEDIA_SRC = re.compile(r'src=["\']([^"\':]+)["\']')
+
+# Tickers cycling cards right now; scheduled popups wait until they stop
+_running = set()
+
+def ticker_running():
+    """Whether a ticker is showing cards, so a scheduled popup would interrupt it."""
+    return bool(_running)
+
+class TickerPage:
+    __slots__ = ("card_id", "note_id", "night_mode", "html")
+
+    def __init__(self, card_id, note_id, night_mode, html):
+        self.card_id = card_id
+        self.note_id = note_id
+        self.night_mode = night_mode
+        self.html = html
+
+class Ticker:
+    """Show a deck's or search's cards in turn, every few seconds."""
+
+    def __init__(self, popup):
+        self.popup = popup
+        self.running = False
+        self.settings = {}
+        self.ids = array('q')
+        self.position = 0
+        # Pages rendered ahead of the one on screen
+        self.window = collections.deque()
+        # Cards changed in a way that may add or remove matches; reloaded after the cycle
+        self.stale = False
+        # A background query for the ids is running
+        self.loading = False
+        self.cards_shown = 0
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.advance)
+        bus.register("ticker", self.evict, (NOTE, NOTETYPE, CARD, DECK))
+
+    def query(self):
+        search = self.settings.get('search', "").strip()
+        if search:
+            return search
+        deck = self.settings.get('deck', "").strip()
+        return f'deck:"{deck}"' if deck else "deck:current"
+
+    def start(self):
+        """Load the card ids in the background and start cycling."""
+        self.settings = Config.get_config().get('ticker', {})
+        self.running = True
+        _running.add(self)
+        self._load()
+
+    def stop(self):
+        self.running = False
+        _running.discard(self)
+        self.timer.stop()
+        self.window.clear()
+        self.ids = array('q')
+        self.position = 0
+
+    def _load(self):
+        if self.loading:
+            return  # Already reloading; small decks wrap again before it returns
+        self.loading = True
+        query = self.query()
+        QueryOp(
+            parent=self.popup,
+            op=lambda col: array('q', col.find_cards(query)),
+            success=self._on_loaded
+        ).failure(self._on_load_failed).run_in_background()
+
+    def _on_loaded(self, ids):
+        self.loading = False
+        if not self.running:
+            return
+        if self.settings.get('shuffle', True):
+            random.shuffle(ids)
+        self.ids = ids
+        self.position = 0
+        self.stale = False
+        self.window.clear()
+        logger.info(f"Ticker cycling {len(ids)} cards from '{self.query()}'")
+        if not ids:
+            self.stop()
+            self.popup.show_message("No cards to show")
+            return
+        if not self.timer.isActive():
+            self.advance()
+            self.timer.start(max(1, self.settings.get('interval_seconds', 20)) * 1000)
+
+    def _on_load_failed(self, error):
+        self.loading = False
+        logger.error(f"Error loading ticker cards for '{self.query()}': {error}", exc_info=error)
+        self.stop()
+        self.popup.show_message("Could not load the ticker's cards")
+
+    def advance(self):
+        """Show the next card and render the ones after it in the background."""
+        if not self.running:
+            return
+        night_mode = mw.pm.night_mode()
+        while self.window and self.window[0].night_mode != night_mode:
+            self.window.popleft()
+        if not self.window:
+            self._render_next(night_mode)
+        if not self.window:
+            return
+        page = self.window.popleft()
+        self.popup.show_ticker_page(page.html)
+        self.cards_shown += 1
+        QTimer.singleShot(0, self._fill_window)
+
+    def _next_id(self):
+        if self.position >= len(self.ids):
+            # Start the next cycle
+            self.position = 0
+            if self.stale:
+                self._load()
+            elif self.settings.get('shuffle', True):
+                random.shuffle(self.ids)
+        card_id = self.ids[self.position]
+        self.position += 1
+        return card_id
+
+    def _render_next(self, night_mode):
+        # Skip cards deleted since the ids were loaded, but not forever
+        for _ in range(min(len(self.ids), 10)):
+            card_id = self._next_id()
+            try:
+                card = mw.col.get_card(card_id)
+                html = self.popup._render_question(card, night_mode)
+            except Exception as e:
+                logger.debug(f"Ticker skipping card {card_id}: {e}")
+                continue
+            self.window.append(TickerPage(card_id, card.nid, night_mode, html))
+            self._preload_media(card, html)
+            return
+
+    @tracked("ticker.prerender")
+    def _fill_window(self):
+        """Render one more page ahead per event loop turn, up to `ticker.prerender`."""
+        if not self.running or len(self.window) >= max(1, self.settings.get('prerender', 3)):
+            return
+        self._render_next(mw.pm.night_mode())
+        QTimer.singleShot(0, self._fill_window)
+
+    def _preload_media(self, card, html):
+        """Read the page's media on a background thread, so it loads from the disk cache."""
+        media_dir = mw.col.media.dir()
+        names = set(MEDIA_SRC.findall(html))
+        try:
+            names.update(tag.filename for tag in card.question_av_tags())
+        except Exception:
+            pass
+        paths = [os.path.join(media_dir, name) for name in names]
+        if paths:
+            mw.taskman.run_in_background(lambda: self._read_files(paths), lambda future: None)
+
+    @staticmethod
+    def _read_files(paths):
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    while f.read(1 << 16):
+                        pass
+            except OSError:
+                pass
+
+    def evict(self, scope, keys):
+        if not self.running:
+            return
+        if scope == COLLECTION:
+            self.window.clear()
+            self._load()
+        elif scope in (NOTE, NOTETYPE):
+            # Rendered pages may be out of date
+            if keys is None:
+                self.window.clear()
+            else:
+                self.window = collections.deque(page for page in self.window if page.note_id not in keys)
+            if scope == NOTE and self.settings.get('search', "").strip():
+                self.stale = True  # Edited tags and fields may change what the search matches
+        else:
+            self.stale = True
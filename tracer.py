@@ -0,0 +1,129 @@
+"""Chrome/Perfetto trace-event export for the Float Cards addon.
+
+Spans come from the addon operations marked with `watchdog.operation`, and
+page-side marks are posted back from the card page over the `miniCard`
+QWebChannel object. Files use the JSON array format, which trace viewers
+accept without the closing bracket, so each flush is a plain append.
+"""
+
+import glob
+import json
+import os
+import time
+from PyQt6.QtCore import QTimer
+
+from .logger import setup_logger, get_log_dir
+from . import watchdog
+
+# Get logger
+logger = setup_logger()
+
+MAIN_TID = 1
+PAGE_TID = 2
+
+def now_us():
+    """Current wall-clock time in microseconds, the unit trace events use."""
+    return time.time_ns() // 1000
+
+class TraceRecorder:
+    """Record nested spans and instant events to rotating trace files."""
+
+    def __init__(self, max_bytes=20 * 1024 * 1024, max_files=5, flush_size=500):
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.flush_size = flush_size
+        self.pid = os.getpid()
+        self.buffer = []
+        self.path = None
+        self.written = 0
+        self.flush_timer = QTimer()
+        self.flush_timer.timeout.connect(self.flush)
+
+    @property
+    def active(self):
+        return self.path is not None
+
+    def start(self):
+        """Start a new trace file and begin recording operations."""
+        if self.active:
+            return
+        self._open_file()
+        watchdog.add_operation_observer(self)
+        self.flush_timer.start(5000)
+        logger.debug(f"Tracing to {self.path}")
+
+    def stop(self):
+        """Stop recording and flush everything to disk.
+
+        Returns:
+            Path of the last trace file written
+        """
+        if not self.active:
+            return None
+        watchdog.remove_operation_observer(self)
+        self.flush_timer.stop()
+        self.flush()
+        path, self.path = self.path, None
+        return path
+
+    def operation_started(self, name):
+        self._emit({"name": name, "cat": "addon", "ph": "B", "ts": now_us(), "tid": MAIN_TID})
+
+    def operation_finished(self, name):
+        self._emit({"name": name, "cat": "addon", "ph": "E", "ts": now_us(), "tid": MAIN_TID})
+
+    def instant(self, name, cat="addon", ts=None, tid=MAIN_TID, args=None):
+        """Record a point-in-time event, e.g. a page load or a page-side mark."""
+        event = {"name": name, "cat": cat, "ph": "i", "s": "t", "ts": ts or now_us(), "tid": tid}
+        if args:
+            event["args"] = args
+        self._emit(event)
+
+    def _emit(self, event):
+        if not self.active:
+            return
+        event["pid"] = self.pid
+        self.buffer.append(event)
+        if len(self.buffer) >= self.flush_size:
+            self.flush()
+
+    def _open_file(self):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        # A rotation within the same second gets the next sequence number instead of truncating
+        sequence = 0
+        while True:
+            self.path = os.path.join(get_log_dir(), f"trace-{stamp}-{sequence:03d}.json")
+            if not os.path.exists(self.path):
+                break
+            sequence += 1
+        self.written = 0
+        self.buffer = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "Float Cards"}},
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": MAIN_TID, "args": {"name": "Qt main thread"}},
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": PAGE_TID, "args": {"name": "Card page"}},
+        ]
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("[\n")
+
+        # Drop the oldest traces beyond the configured number of files
+        traces = sorted(glob.glob(os.path.join(get_log_dir(), "trace-*.json")))
+        for old_path in traces[:-self.max_files]:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def flush(self):
+        """Append buffered events to the current file, rotating it when full."""
+        if not self.buffer or self.path is None:
+            return
+        events, self.buffer = self.buffer, []
+        try:
+            data = "".join(json.dumps(event, separators=(',', ':')) + ",\n" for event in events)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+            self.written += len(data)
+            if self.written >= self.max_bytes:
+                self._open_file()
+        except Exception as e:
+            logger.error(f"Error writing trace events: {str(e)}", exc_info=True)
@@ -0,0 +1,149 @@
+"""GUI-thread stall detection for the Float Cards addon.
+
+A heartbeat timer on the Qt main thread records when the event loop last
+ticked. A daemon thread checks the heartbeat and, when the loop has been
+blocked for longer than the threshold, captures the main thread's Python
+stack and logs it together with the addon operation that was running.
+"""
+
+import functools
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from PyQt6.QtCore import QTimer
+
+from .logger import setup_logger, setup_diagnostics_logger
+
+# Get logger
+logger = setup_logger()
+
+# Stack of addon operations currently running on the main thread
+_operations = []
+
+# Observers told when operations start and finish (see tracer.py, replay.py)
+_observers = ()
+
+def add_operation_observer(observer):
+    """Notify `observer` of operation starts and finishes."""
+    global _observers
+    if observer not in _observers:
+        _observers = _observers + (observer,)
+
+def remove_operation_observer(observer):
+    global _observers
+    _observers = tuple(o for o in _observers if o is not observer)
+
+@contextmanager
+def operation(name):
+    """Mark a block of main-thread work as the active addon operation."""
+    _operations.append(name)
+    observers = _observers
+    for observer in observers:
+        observer.operation_started(name)
+    try:
+        yield
+    finally:
+        _operations.pop()
+        for observer in observers:
+            observer.operation_finished(name)
+
+def tracked(name):
+    """Decorator version of `operation`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with operation(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def operation_active(name):
+    """Whether `name` is anywhere on the active operation stack."""
+    return name in _operations
+
+def current_operation():
+    """Describe the active operation stack, e.g. 'grade_card > update_card'."""
+    operations = list(_operations)
+    return " > ".join(operations) if operations else "none"
+
+class StallDetector:
+    """Detect and report event-loop stalls on the Qt main thread."""
+
+    def __init__(self, threshold_ms=250):
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_interval = 0.1
+        self.last_beat = time.monotonic()
+        self.main_thread_id = threading.main_thread().ident
+        self.stalls = 0
+        self.report_logger = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.heartbeat = QTimer()
+        self.heartbeat.timeout.connect(self._beat)
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        """Start the heartbeat timer and the watchdog thread."""
+        if self.running:
+            return
+        self.report_logger = setup_diagnostics_logger('stalls', 'stalls.log')
+        self.heartbeat_interval = min(0.1, self.threshold / 2)
+        self.last_beat = time.monotonic()
+        self.heartbeat.start(int(self.heartbeat_interval * 1000))
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._watch, name="FloatCardsWatchdog", daemon=True)
+        self.thread.start()
+        logger.debug(f"Stall detector started with {self.threshold * 1000:.0f}ms threshold")
+
+    def stop(self):
+        """Stop watching the main thread."""
+        if not self.running:
+            return
+        self.heartbeat.stop()
+        self.stop_event.set()
+        self.thread.join(timeout=1)
+        self.thread = None
+
+    def update_state(self, config):
+        """Start or stop the detector based on configuration."""
+        diagnostics = config.get('diagnostics', {})
+        threshold = diagnostics.get('stall_threshold_ms', 250) / 1000
+        if self.running and threshold != self.threshold:
+            self.stop()
+        self.threshold = threshold
+        if diagnostics.get('stall_detector', False):
+            self.start()
+        else:
+            self.stop()
+
+    def _beat(self):
+        self.last_beat = time.monotonic()
+
+    def _watch(self):
+        reported_beat = None
+        check_interval = max(self.threshold / 4, 0.02)
+        while not self.stop_event.wait(check_interval):
+            last_beat = self.last_beat
+            blocked = time.monotonic() - last_beat - self.heartbeat_interval
+            # Report each stall once, while it is still in progress
+            if blocked > self.threshold and last_beat != reported_beat:
+                reported_beat = last_beat
+                self._report(blocked)
+
+    def _report(self, blocked):
+        try:
+            active = current_operation()
+            frame = sys._current_frames().get(self.main_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+            self.stalls += 1
+            self.report_logger.warning(
+                f"Main thread blocked for {blocked * 1000:.0f}ms "
+                f"during operation: {active}\n{stack}"
+            )
+        except Exception as e:
+            logger.error(f"Error reporting stall: {str(e)}", exc_info=True)